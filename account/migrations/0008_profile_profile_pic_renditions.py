@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0007_rename_specialty_profile_speciality'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
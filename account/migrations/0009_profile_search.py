@@ -0,0 +1,95 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:46
+
+from django.db import migrations, models
+from lavender.search import normalize_text
+
+
+def build_search_documents(apps, schema_editor):
+    Profile = apps.get_model('account', 'Profile')
+    batch = []
+    for profile in Profile.objects.select_related('user').iterator(chunk_size=2000):
+        user = profile.user
+        profile.search_document = normalize_text(' '.join([
+            user.first_name, user.last_name, user.email,
+            profile.speciality, profile.extra_specialty, profile.country, profile.bio,
+        ]))
+        batch.append(profile)
+        if len(batch) >= 500:
+            Profile.objects.bulk_update(batch, ['search_document'])
+            batch = []
+    Profile.objects.bulk_update(batch, ['search_document'])
+
+
+SQLITE_FORWARD = [
+    """
+    CREATE VIRTUAL TABLE account_profile_fts USING fts5(
+        search_document, content='account_profile', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER account_profile_fts_ai AFTER INSERT ON account_profile BEGIN
+        INSERT INTO account_profile_fts(rowid, search_document) VALUES (new.id, new.search_document);
+    END
+    """,
+    """
+    CREATE TRIGGER account_profile_fts_ad AFTER DELETE ON account_profile BEGIN
+        INSERT INTO account_profile_fts(account_profile_fts, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+    END
+    """,
+    """
+    CREATE TRIGGER account_profile_fts_au AFTER UPDATE OF search_document ON account_profile BEGIN
+        INSERT INTO account_profile_fts(account_profile_fts, rowid, search_document)
+        VALUES ('delete', old.id, old.search_document);
+        INSERT INTO account_profile_fts(rowid, search_document) VALUES (new.id, new.search_document);
+    END
+    """,
+    "INSERT INTO account_profile_fts(account_profile_fts) VALUES ('rebuild')",
+]
+
+SQLITE_BACKWARD = [
+    "DROP TRIGGER IF EXISTS account_profile_fts_au",
+    "DROP TRIGGER IF EXISTS account_profile_fts_ad",
+    "DROP TRIGGER IF EXISTS account_profile_fts_ai",
+    "DROP TABLE IF EXISTS account_profile_fts",
+]
+
+POSTGRES_FORWARD = [
+    "CREATE INDEX account_profile_search_fts ON account_profile USING gin (to_tsvector('simple', coalesce(search_document, '')))",
+]
+
+POSTGRES_BACKWARD = [
+    "DROP INDEX IF EXISTS account_profile_search_fts",
+]
+
+
+def run_for_vendor(sqlite, postgres):
+    def run(apps, schema_editor):
+        statements = {'sqlite': sqlite, 'postgresql': postgres}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_profile_profile_pic_renditions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='search_document',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(build_search_documents, migrations.RunPython.noop),
+        # Same layout as chat's message index: an external-content FTS5 table
+        # kept in sync by triggers on SQLite, a GIN expression index on
+        # PostgreSQL. Other backends fall back to LIKE in account.search.
+        migrations.RunPython(
+            run_for_vendor(SQLITE_FORWARD, POSTGRES_FORWARD),
+            run_for_vendor(SQLITE_BACKWARD, POSTGRES_BACKWARD),
+        ),
+    ]
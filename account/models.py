@@ -6,6 +6,8 @@ from rest_framework import serializers
 import re
 from django.core.exceptions import ValidationError
 from django.utils import timezone
+from django.utils.functional import cached_property
+from lavender.search import normalize_text
 
 class GenderChoices(models.TextChoices):
     MALE = 'Male', 'Male'
@@ -54,6 +56,7 @@ class SpecialtyChoices(models.TextChoices):
 class Profile(models.Model):
     user = models.OneToOneField(User, related_name='profile', on_delete=models.CASCADE)
     profile_pic = models.ImageField(upload_to='profile_pics/', default='profile_pics/default_profile.jpg')
+    profile_pic_renditions = models.JSONField(default=dict, blank=True)
     date_of_birth = models.DateTimeField(null=True, blank=True)
     gender = models.CharField(max_length=7, default=GenderChoices.NONE, blank=True, choices=GenderChoices.choices)
     phone_number = models.CharField(max_length=11, default='', blank=True)
@@ -69,10 +72,26 @@ class Profile(models.Model):
     working_days = models.JSONField(default=list, blank=True)
     start_time = models.TimeField(null=True, blank=True)
     end_time = models.TimeField(null=True, blank=True)
+    # normalized text indexed for full-text search, see account.search
+    search_document = models.TextField(blank=True, default='', editable=False)
 
     def __str__(self):
         return self.user.email
 
+    def build_search_document(self):
+        user = self.user
+        return normalize_text(' '.join([
+            user.first_name, user.last_name, user.email,
+            self.speciality, self.extra_specialty, self.country, self.bio,
+        ]))
+
+    def save(self, *args, **kwargs):
+        self.search_document = self.build_search_document()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'search_document' not in update_fields:
+            kwargs['update_fields'] = [*update_fields, 'search_document']
+        super().save(*args, **kwargs)
+
     def clean(self):
         super().clean()
         if self.phone_number:
@@ -81,7 +100,8 @@ class Profile(models.Model):
             if len(self.phone_number) != 11:
                 raise ValidationError("Phone number must be exactly 11 digits.")
     
-    @property
+    # cached so list querysets can annotate these instead of querying per profile
+    @cached_property
     def avg_rating(self):
         reviews = self.reviews.all()
         if reviews.exists():
@@ -98,15 +118,29 @@ class Profile(models.Model):
         today = timezone.now().date()
         return self.appointments.filter(is_booked=False, date__gte=today)
 
-    @property
+    @cached_property
     def prev_count(self):
         return self.prev_appointments.count()
 
-    @property
+    @cached_property
     def available_count(self):
         return self.available_appointments.count()
 
+# User fields that are part of the profile's search document
+SEARCHED_USER_FIELDS = {'first_name', 'last_name', 'email'}
+
+
 @receiver(post_save, sender=User)
-def save_profile(sender, instance, created, **kwargs):
+def save_profile(sender, instance, created, update_fields=None, **kwargs):
     if created:
         Profile.objects.create(user=instance)
+    elif update_fields is None or SEARCHED_USER_FIELDS.intersection(update_fields):
+        # read the profile afresh, a cached instance.profile may be stale
+        profile = (
+            Profile.objects.only('pk', 'speciality', 'extra_specialty', 'country', 'bio')
+            .filter(user=instance)
+            .first()
+        )
+        if profile is not None:
+            profile.user = instance
+            Profile.objects.filter(pk=profile.pk).update(search_document=profile.build_search_document())
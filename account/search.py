@@ -0,0 +1,119 @@
+from django.conf import settings
+from django.db import connection
+from lavender.search import fts5_match, normalize_text, tokenize, tsquery_text
+from .models import RoleChoices
+
+FACETS = ("speciality", "gender", "country")
+
+PG_DOCUMENT = "to_tsvector('simple', coalesce(p.search_document, ''))"
+
+
+def _match(text):
+    """
+    ``(source, where, where_params, rank, rank_params)`` SQL fragments that
+    find specialists whose search document matches ``text`` on the current
+    backend, or ``None`` when ``text`` has nothing to search for. ``p`` is
+    the profile table alias.
+    """
+    text = normalize_text(text)
+    if connection.vendor == "sqlite":
+        match = fts5_match(text)
+        if match is None:
+            return None
+        source = "account_profile_fts f JOIN account_profile p ON p.id = f.rowid"
+        return source, "account_profile_fts MATCH %s", [match], "-bm25(account_profile_fts)", []
+    if connection.vendor == "postgresql":
+        words = tsquery_text(text)
+        if not words:
+            return None
+        query = "plainto_tsquery('simple', %s)"
+        return "account_profile p", f"{PG_DOCUMENT} @@ {query}", [words], f"ts_rank({PG_DOCUMENT}, {query})", [words]
+    words = tokenize(text)
+    if not words:
+        return None
+    where = " AND ".join(["p.search_document LIKE %s"] * len(words))
+    return "account_profile p", where, [f"%{word}%" for word in words], "1.0", []
+
+
+def _filter_sql(filters, skip=None):
+    sql, params = "", []
+    for field, value in filters.items():
+        if field != skip and value:
+            sql += f" AND p.{field} = %s"
+            params.append(value)
+    return sql, params
+
+
+def matching_ids(text):
+    """
+    ``(sql, params)`` selecting the ids of profiles matching ``text``, for
+    ``id__in=RawSQL(...)``; ``None`` when there is nothing to search for.
+    """
+    match = _match(text)
+    if match is None:
+        return None
+    source, where, params, _, _ = match
+    return f"SELECT p.id FROM {source} WHERE {where}", params
+
+
+def search_specialists(text, filters, limit, offset=0):
+    """
+    Rank specialists matching ``text`` and narrowed by exact ``filters`` on
+    the ``FACETS`` columns. Text relevance is scaled up by the average rating
+    (``SPECIALIST_SEARCH_RATING_WEIGHT`` is the boost of a 5-star average).
+
+    Returns ``(hits, total, facets)``: the ``(id, score)`` pairs of the
+    requested page, the number of matches and, per facet, ``(value, count)``
+    pairs counted with every filter but that facet's own. Returns ``None``
+    when ``text`` has nothing to search for.
+    """
+    match = _match(text)
+    if match is None:
+        return None
+    source, where, match_params, rank, rank_params = match
+    base_where = f"{where} AND p.role = %s"
+    base_params = [*match_params, RoleChoices.SPECIALIST]
+
+    filter_sql, filter_params = _filter_sql(filters)
+    sql = f"""
+        SELECT p.id, {rank} * (1 + %s * COALESCE(
+            (SELECT AVG(r.rating) FROM activities_review r WHERE r.specialist_id = p.id), 0
+        ) / 5.0) AS score
+        FROM {source}
+        WHERE {base_where}{filter_sql}
+        ORDER BY score DESC, p.id
+        LIMIT %s OFFSET %s
+    """
+    params = [*rank_params, settings.SPECIALIST_SEARCH_RATING_WEIGHT, *base_params, *filter_params, limit, offset]
+
+    # every facet and the total are counted from one materialized match
+    branches, facet_params = [], []
+    for facet in FACETS:
+        branch_sql, branch_params = _filter_sql(filters, skip=facet)
+        branches.append(
+            f"SELECT '{facet}', p.{facet}, COUNT(*) FROM hits p WHERE 1 = 1{branch_sql} GROUP BY p.{facet}"
+        )
+        facet_params += branch_params
+    branches.append(f"SELECT '', NULL, COUNT(*) FROM hits p WHERE 1 = 1{filter_sql}")
+    facet_params += filter_params
+    facets_sql = f"""
+        WITH hits AS (SELECT p.id, {", ".join(f"p.{facet}" for facet in FACETS)} FROM {source} WHERE {base_where})
+        {" UNION ALL ".join(branches)}
+    """
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        hits = cursor.fetchall()
+        cursor.execute(facets_sql, [*base_params, *facet_params])
+        rows = cursor.fetchall()
+
+    total = 0
+    facets = {facet: [] for facet in FACETS}
+    for facet, value, count in rows:
+        if facet:
+            facets[facet].append((value, count))
+        else:
+            total = count
+    for counts in facets.values():
+        counts.sort(key=lambda item: (-item[1], item[0] or ""))
+    return hits, total, facets
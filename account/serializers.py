@@ -2,6 +2,7 @@ from rest_framework import serializers
 from .models import Profile, SpecialtyChoices
 from django.contrib.auth.models import User
 from appointments.serializers import AppointmentSerializer
+from lavender.images import RenditionImageField, schedule_renditions
 
 
 class CreateAccountSerializer(serializers.ModelSerializer):
@@ -30,6 +31,7 @@ class ProfileSerializer(serializers.ModelSerializer):
     specialty_display = serializers.CharField(source='get_specialty_display', read_only=True)
     extra_specialty_display = serializers.CharField(source='get_extra_specialty_display', read_only=True)
     appointments = AppointmentSerializer(many=True, read_only=True)
+    profile_pic_url = RenditionImageField('profile_pic', 'profile_pic_renditions')
 
     prev_count = serializers.IntegerField(read_only=True)
     available_count = serializers.IntegerField(read_only=True)
@@ -39,6 +41,7 @@ class ProfileSerializer(serializers.ModelSerializer):
         fields = [
             'user',
             'profile_pic',
+            'profile_pic_url',
             'date_of_birth',
             'gender',
             'phone_number',
@@ -69,6 +72,9 @@ class ProfileSerializer(serializers.ModelSerializer):
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
         instance.save()
+
+        if 'profile_pic' in validated_data:
+            schedule_renditions(instance, 'profile_pic', 'profile_pic_renditions')
         return instance
 
     def to_representation(self, instance):
@@ -89,6 +95,52 @@ class ProfileSerializer(serializers.ModelSerializer):
 
         return data
 
+class SpecialistListSerializer(serializers.ModelSerializer):
+    """
+    Compact specialist for directory listings. Expects the rating and
+    appointment counts to be annotated; the ``appointments`` field is only
+    included when the view prefetched them into ``next_appointments``.
+    """
+    user = UserSerializer(read_only=True)
+    profile_pic_url = RenditionImageField('profile_pic', 'profile_pic_renditions')
+    avg_rating = serializers.FloatField(read_only=True)
+    reviews_count = serializers.IntegerField(read_only=True)
+    prev_count = serializers.IntegerField(read_only=True)
+    available_count = serializers.IntegerField(read_only=True)
+    appointments = AppointmentSerializer(source='next_appointments', many=True, read_only=True)
+
+    # columns the serializer reads, for ``only()``
+    load_fields = [
+        'id', 'profile_pic', 'profile_pic_renditions', 'gender', 'role', 'country', 'years_of_experience',
+        'price_per_hour', 'speciality', 'extra_specialty',
+        'user__id', 'user__email', 'user__first_name', 'user__last_name',
+    ]
+
+    class Meta:
+        model = Profile
+        fields = [
+            'id',
+            'user',
+            'profile_pic_url',
+            'gender',
+            'country',
+            'years_of_experience',
+            'price_per_hour',
+            'speciality',
+            'extra_specialty',
+            'avg_rating',
+            'reviews_count',
+            'prev_count',
+            'available_count',
+            'appointments',
+        ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if not self.context.get('expand_appointments'):
+            self.fields.pop('appointments')
+
+
 # class ProfileSerializer(serializers.ModelSerializer):
 #     user = UserSerializer(read_only=True)
 #     specialty_display = serializers.CharField(source='get_specialty_display', read_only=True)
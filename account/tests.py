@@ -1,3 +1,30 @@
+from django.contrib.auth.models import User, update_last_login
 from django.test import TestCase
 
-# Create your tests here.
+from .models import Profile
+
+
+class ProfileSearchDocumentTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="ann", email="ann@example.com", first_name="Ann")
+        self.user.profile.speciality = "Psychiatrist"
+        self.user.profile.save()
+
+    def search_document(self):
+        return Profile.objects.get(user=self.user).search_document
+
+    def test_recording_a_login_leaves_the_profile_alone(self):
+        with self.assertNumQueries(1):
+            update_last_login(None, self.user)
+
+    def test_renaming_the_user_rebuilds_the_document_from_the_stored_profile(self):
+        user = User.objects.select_related("profile").get(pk=self.user.pk)
+        Profile.objects.filter(user=user).update(country="Egypt")
+
+        user.first_name = "Nour"
+        user.save(update_fields=["first_name"])
+
+        document = self.search_document()
+        self.assertIn("nour", document)
+        self.assertIn("egypt", document)
+        self.assertTrue(document.startswith("nour "))
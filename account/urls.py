@@ -14,6 +14,7 @@ urlpatterns = [
     path('specialist/login', views.login_specialist, name='login_specialist'),
     path('specialist/userinfo', views.current_user, name='user_info'),
     path('specialists/', views.get_all_specialists, name='get_all_specialists'),
+    path('specialists/search/', views.specialist_search, name='specialist_search'),
     path('specialist/updateMe', views.update_specialist_profile, name='update_specialist_profile'),
     path('specialist/forgotPassword', views.user_forgot_password, name='forgot_password'),
     path('specialist/resetPassword/<str:resetToken>', views.user_reset_password, name='reset_password'),
@@ -1,6 +1,25 @@
+from django.db.models import Avg, Count, FloatField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Round
 from rest_framework.pagination import PageNumberPagination
+from activities.models import Review
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 10 
     page_size_query_param = 'page_size' 
     max_page_size = 50
+
+
+def annotate_rating(profiles):
+    """
+    Annotate a ``Profile`` queryset with ``avg_rating`` (rounded to one
+    decimal, 0.0 without reviews) and ``reviews_count`` as correlated
+    subqueries, so they don't multiply rows of other annotations.
+    """
+    reviews = Review.objects.filter(specialist=OuterRef("pk")).values("specialist")
+    return profiles.annotate(
+        avg_rating=Coalesce(
+            Subquery(reviews.annotate(value=Round(Avg("rating"), 1)).values("value")), 0.0,
+            output_field=FloatField(),
+        ),
+        reviews_count=Coalesce(Subquery(reviews.annotate(value=Count("id")).values("value")), 0),
+    )
@@ -16,7 +16,14 @@ from django.utils.crypto import get_random_string
 from django.core.mail import send_mail
 from datetime import timedelta
 from django.db.models import Q
-from .utils import StandardResultsSetPagination
+from .utils import StandardResultsSetPagination, annotate_rating
+from .search import FACETS, matching_ids, search_specialists
+from appointments.analytics import annotate_appointment_counts
+from appointments.models import Appointment
+from django.db.models import Prefetch
+from django.db.models.expressions import RawSQL
+from lavender.pagination import get_page_size
+from django.conf import settings
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
@@ -182,26 +189,46 @@ def register_specialist(request):
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def get_all_specialists(request):
+    """
+    Paginated specialist directory. ``?expand=appointments`` adds each
+    specialist's next ``SPECIALIST_LIST_EXPAND_SLOTS`` available slots.
+    """
     try:
         search_query = request.GET.get('search', '').strip()
-        specialists = Profile.objects.select_related('user').filter(role=RoleChoices.SPECIALIST)
+        expand = set(filter(None, request.GET.get('expand', '').split(',')))
+        specialists = (
+            Profile.objects.select_related('user')
+            .only(*SpecialistListSerializer.load_fields)
+            .filter(role=RoleChoices.SPECIALIST)
+        )
 
         if search_query:
-            specialists = specialists.filter(
-                Q(user__first_name__icontains=search_query) |
-                Q(user__last_name__icontains=search_query) |
-                Q(user__email__icontains=search_query) |
-                Q(speciality__icontains=search_query) |
-                Q(country__icontains=search_query) |
-                Q(gender__icontains=search_query)
-
+            # gender isn't part of the search document, so keep matching it directly
+            matching = Q(gender__icontains=search_query)
+            matches = matching_ids(search_query)
+            if matches is not None:
+                matching |= Q(id__in=RawSQL(*matches))
+            specialists = specialists.filter(matching)
+
+        specialists = annotate_rating(annotate_appointment_counts(specialists)).order_by('id')
+        if 'appointments' in expand:
+            today = timezone.now().date()
+            next_slots = (
+                Appointment.objects.filter(Appointment.bookable(), date__gte=today)
+                .order_by('date', 'start_time')[:settings.SPECIALIST_LIST_EXPAND_SLOTS]
+            )
+            specialists = specialists.prefetch_related(
+                Prefetch('appointments', queryset=next_slots, to_attr='next_appointments')
             )
 
         # Pagination
         paginator = StandardResultsSetPagination()
         paginated_specialists = paginator.paginate_queryset(specialists, request)
 
-        serializer = ProfileSerializer(paginated_specialists, many=True)
+        serializer = SpecialistListSerializer(
+            paginated_specialists, many=True,
+            context={'request': request, 'expand_appointments': 'appointments' in expand},
+        )
         return paginator.get_paginated_response({
             "status": "success",
             "specialists": serializer.data
@@ -214,6 +241,49 @@ def get_all_specialists(request):
         }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def specialist_search(request):
+    """
+    Full-text specialist search, best matches first with higher rated
+    specialists boosted. ``?q=`` is required; ``speciality``, ``gender`` and
+    ``country`` narrow the results and ``facets`` counts the values of each.
+    """
+    text = request.GET.get('q', '').strip()
+    filters = {facet: request.GET.get(facet, '').strip() for facet in FACETS}
+    page_size = get_page_size(request, settings.SPECIALIST_SEARCH_PAGE_SIZE, settings.SPECIALIST_SEARCH_MAX_PAGE_SIZE)
+    try:
+        page = max(1, int(request.GET.get('page', 1)))
+    except ValueError:
+        page = 1
+
+    result = search_specialists(text, filters, page_size, (page - 1) * page_size)
+    if result is None:
+        return Response({
+            "status": "failed",
+            "message": "Query parameter q is required.",
+        }, status=status.HTTP_400_BAD_REQUEST)
+    hits, total, facets = result
+
+    profiles = annotate_rating(annotate_appointment_counts(
+        Profile.objects.select_related('user').only(*SpecialistListSerializer.load_fields)
+    )).in_bulk([profile_id for profile_id, _ in hits])
+    # a profile deleted since the ranking query is simply left out
+    serializer = SpecialistListSerializer(
+        [profiles[profile_id] for profile_id, _ in hits if profile_id in profiles], many=True, context={'request': request}
+    )
+    return Response({
+        "status": "success",
+        "count": total,
+        "page": page,
+        "specialists": serializer.data,
+        "facets": {
+            facet: [{"value": value, "count": count} for value, count in counts]
+            for facet, counts in facets.items()
+        },
+    }, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_all_users(request):
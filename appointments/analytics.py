@@ -0,0 +1,113 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Count, DecimalField, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Appointment, SpecialistStats
+
+PERIODS = {
+    "week": TruncWeek,
+    "month": TruncMonth,
+}
+
+
+def appointment_metrics(today=None):
+    """
+    Conditional aggregates over appointments, all computed in one pass:
+    ``booked``, ``available``, ``past`` (the same rows as
+    ``Appointment.previous_for_profile``), ``paid`` and ``revenue``.
+    """
+    now = timezone.now()
+    today = today or now.date()
+    paid = Q(booking__is_paid=True)
+    return {
+        "booked": Count("id", filter=Q(is_booked=True) & ~Q(held_until__lte=now)),
+        "available": Count("id", filter=Appointment.bookable() & Q(date__gte=today)),
+        "past": Count("id", filter=Q(date__lt=today) | Q(is_booked=True)),
+        "paid": Count("id", filter=paid),
+        "revenue": Sum(
+            "profile__price_per_hour",
+            filter=paid,
+            default=Decimal("0"),
+            output_field=DecimalField(max_digits=12, decimal_places=2),
+        ),
+    }
+
+
+def specialist_summary(profile, today=None):
+    """All-time figures for one specialist with a single aggregate query."""
+    return Appointment.objects.filter(profile=profile).aggregate(**appointment_metrics(today))
+
+
+def specialist_buckets(profile=None, period="week", since=None, until=None, today=None):
+    """
+    Figures grouped into ``period`` buckets (``"week"`` or ``"month"``) of the
+    appointment date, oldest first, as dicts with a ``bucket`` date. Without
+    ``profile`` every specialist is included and rows carry ``profile_id``.
+    """
+    appointments = Appointment.objects.all()
+    if profile is not None:
+        appointments = appointments.filter(profile=profile)
+    if since is not None:
+        appointments = appointments.filter(date__gte=since)
+    if until is not None:
+        appointments = appointments.filter(date__lt=until)
+
+    group_by = ["bucket"] if profile is not None else ["profile_id", "bucket"]
+    return list(
+        appointments.annotate(bucket=PERIODS[period]("date"))
+        .values(*group_by)
+        .annotate(**appointment_metrics(today))
+        .order_by(*group_by)
+    )
+
+
+def annotate_appointment_counts(profiles, today=None):
+    """
+    Annotate a ``Profile`` queryset with ``prev_count`` and
+    ``available_count`` so listing specialists does not count per row.
+    """
+    metrics = appointment_metrics(today)
+    per_profile = Appointment.objects.filter(profile=OuterRef("pk")).values("profile")
+
+    def count(metric):
+        # a correlated subquery rather than a join, so it composes with other
+        # annotations and pagination's count() can drop it
+        return Coalesce(Subquery(per_profile.annotate(value=metrics[metric]).values("value")), 0)
+
+    return profiles.annotate(prev_count=count("past"), available_count=count("available"))
+
+
+def snapshot_start(period, months_back, today=None):
+    """First day of the oldest bucket a snapshot covering ``months_back`` keeps."""
+    today = today or timezone.now().date()
+    start = today.replace(day=1)
+    for _ in range(months_back):
+        start = (start - timedelta(days=1)).replace(day=1)
+    if period == "week":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def refresh_snapshots(period, since, today=None):
+    """
+    Recompute every specialist's ``period`` buckets from ``since`` onwards
+    with one grouped query and upsert them into ``SpecialistStats``; buckets
+    that no longer have appointments are removed. Returns the rows written.
+    """
+    computed_at = timezone.now()
+    rows = [
+        SpecialistStats(period=period, computed_at=computed_at, **row)
+        for row in specialist_buckets(period=period, since=since, today=today)
+    ]
+    SpecialistStats.objects.bulk_create(
+        rows,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=["profile", "period", "bucket"],
+        update_fields=["booked", "available", "past", "paid", "revenue", "computed_at"],
+    )
+    SpecialistStats.objects.filter(period=period, bucket__gte=since, computed_at__lt=computed_at).delete()
+    return len(rows)
@@ -0,0 +1,135 @@
+import logging
+from datetime import timedelta
+
+import stripe
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from .models import Appointment, Booking, CheckoutAttempt
+
+logger = logging.getLogger(__name__)
+
+
+class SlotUnavailable(Exception):
+    pass
+
+
+def claim_slot(appointment_id, patient, hold=False):
+    """
+    Claim a slot, so of two concurrent patients exactly one wins; the loser
+    gets ``SlotUnavailable``. The appointment row is locked first (on
+    backends with ``SELECT ... FOR UPDATE``; SQLite serializes writers) and
+    the claim is a conditional UPDATE on that row's own columns. A slot whose
+    checkout hold has lapsed can be claimed again, unless a Stripe checkout
+    was opened for it: ``release_expired_holds`` asks Stripe about those
+    first. With ``hold`` the slot is only held for
+    ``APPOINTMENT_HOLD_MINUTES`` until the booking is paid.
+    Must run inside a transaction; returns the new unpaid ``Booking``.
+    """
+    held_until = timezone.now() + timedelta(minutes=settings.APPOINTMENT_HOLD_MINUTES) if hold else None
+    slot = Appointment.objects.select_for_update().only("pk", "is_booked").filter(pk=appointment_id).first()
+    if slot is None:
+        raise SlotUnavailable("This appointment is already booked.")
+    if slot.is_booked and Booking.objects.filter(
+        appointment_id=appointment_id, is_paid=False, payment_reference__isnull=False
+    ).exists():
+        raise SlotUnavailable("This appointment is already booked.")
+    claimed = Appointment.objects.filter(Appointment.bookable(), pk=appointment_id).update(
+        is_booked=True, held_until=held_until
+    )
+    if not claimed:
+        raise SlotUnavailable("This appointment is already booked.")
+    # drop the unpaid booking of a lapsed hold we just took over
+    Booking.objects.filter(appointment_id=appointment_id, is_paid=False).delete()
+    return Booking.objects.create(patient=patient, appointment_id=appointment_id, is_paid=False)
+
+
+def release_booking(booking):
+    """Give up an unpaid booking, e.g. when opening the checkout failed."""
+    with transaction.atomic():
+        Booking.objects.filter(pk=booking.pk, is_paid=False).delete()
+        Appointment.objects.filter(pk=booking.appointment_id, booking__isnull=True).update(
+            is_booked=False, held_until=None
+        )
+
+
+def settle_checkout(session_id):
+    """
+    Before giving up the hold of ``session_id``: confirm the booking if the
+    patient paid after all, otherwise expire the session so it can no longer
+    be paid. Returns true when the hold may be released.
+    """
+    session = stripe.checkout.Session.retrieve(session_id)
+    if session.status == "open":
+        session = stripe.checkout.Session.expire(session_id)
+    if session.payment_status == "paid":
+        confirm_checkout(session_id, session)
+        return False
+    # an expired session can't be paid any more; a completed but unpaid one
+    # is an asynchronous payment still clearing, so keep holding the slot
+    return session.status == "expired"
+
+
+def release_expired_holds(now=None):
+    """
+    Free slots whose hold lapsed without payment. Holds with a Stripe
+    checkout are settled with Stripe first, so a late payment confirms the
+    booking instead of losing the slot. Returns how many were freed.
+    """
+    now = now or timezone.now()
+    expired = Appointment.objects.filter(is_booked=True, held_until__lte=now).exclude(booking__is_paid=True)
+    sessions = Booking.objects.filter(
+        appointment__in=expired, is_paid=False, payment_reference__isnull=False
+    ).values_list("appointment_id", "payment_reference")
+    unsettled = []
+    for appointment_id, session_id in sessions:
+        try:
+            if not settle_checkout(session_id):
+                unsettled.append(appointment_id)
+        except stripe.error.StripeError:
+            logger.exception("Could not settle checkout session %s; keeping its hold", session_id)
+            unsettled.append(appointment_id)
+    with transaction.atomic():
+        ids = list(expired.exclude(id__in=unsettled).values_list("id", flat=True))
+        Booking.objects.filter(appointment_id__in=ids, is_paid=False).delete()
+        return Appointment.objects.filter(id__in=ids, held_until__lte=now).update(is_booked=False, held_until=None)
+
+
+def record_checkout(user, key, appointment_id):
+    """
+    Register the idempotency ``key`` for ``user``. Returns ``(attempt,
+    created)``; ``created`` is false when the key was already used.
+    """
+    try:
+        with transaction.atomic():
+            return CheckoutAttempt.objects.create(user=user, key=key, appointment_id=appointment_id), True
+    except IntegrityError:
+        return CheckoutAttempt.objects.get(user=user, key=key), False
+
+
+def confirm_checkout(session_id, session=None):
+    """
+    Mark the booking paid for by Stripe checkout ``session_id`` and make its
+    slot permanent. ``session`` is the checkout session when the caller
+    already has it, e.g. from a webhook. Returns the booking, or ``None`` if
+    nothing was confirmed.
+    """
+    booking = Booking.objects.filter(payment_reference=session_id).first()
+    if booking is None:
+        logger.warning("No booking for checkout session %s; its hold may have lapsed", session_id)
+        return None
+    if booking.is_paid:
+        return booking
+    session = session or stripe.checkout.Session.retrieve(session_id)
+    if session.payment_status != "paid":
+        return None
+    with transaction.atomic():
+        # conditional, so only one of the redirect, the webhook and the
+        # hold release confirms the booking, and only while it still exists
+        paid = Booking.objects.filter(pk=booking.pk, is_paid=False, payment_reference=session_id).update(is_paid=True)
+        if paid == 1:
+            Appointment.objects.filter(pk=booking.appointment_id).update(is_booked=True, held_until=None)
+    booking = Booking.objects.filter(pk=booking.pk, is_paid=True).first()
+    if booking is None:
+        logger.error("Checkout session %s was paid but its booking is gone; refund it", session_id)
+    return booking
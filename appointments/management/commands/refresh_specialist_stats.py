@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from appointments.analytics import PERIODS, refresh_snapshots, snapshot_start
+
+
+class Command(BaseCommand):
+    help = "Precompute weekly and monthly specialist appointment figures for the analytics dashboard (run nightly)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--period", choices=sorted(PERIODS), action="append",
+                            help="Bucket size to refresh; repeatable. Defaults to all.")
+        parser.add_argument("--months", type=int, default=settings.APPOINTMENT_STATS_MONTHS,
+                            help="How many past months of buckets to recompute.")
+
+    def handle(self, *args, **options):
+        for period in options["period"] or sorted(PERIODS):
+            since = snapshot_start(period, options["months"])
+            with transaction.atomic():
+                count = refresh_snapshots(period, since)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {count} {period} buckets since {since}."))
@@ -0,0 +1,22 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from appointments.booking import release_expired_holds
+
+
+class Command(BaseCommand):
+    help = "Free appointment slots whose checkout hold lapsed without payment"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep running instead of exiting after one pass.")
+        parser.add_argument("--interval", type=int, default=settings.APPOINTMENT_HOLD_RELEASE_INTERVAL,
+                            help="Seconds between passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            count = release_expired_holds()
+            self.stdout.write(self.style.SUCCESS(f"Released {count} expired holds."))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('account', '0008_profile_profile_pic_renditions'),
+        ('appointments', '0003_booking_holds'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['is_booked', 'date', 'start_time'], name='appointment_open_slot_idx'),
+        ),
+    ]
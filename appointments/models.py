@@ -7,9 +7,14 @@ class Appointment(models.Model):
     start_time = models.TimeField()
     end_time = models.TimeField()
     is_booked = models.BooleanField(default=False)
+    # set while an unpaid checkout holds the slot; the hold lapses after this
+    held_until = models.DateTimeField(null=True, blank=True)
 
     class Meta:
         unique_together = ("profile", "date", "start_time")
+        indexes = [
+            models.Index(fields=["is_booked", "date", "start_time"], name="appointment_open_slot_idx"),
+        ]
 
     @property
     def price(self):
@@ -27,7 +32,12 @@ class Appointment(models.Model):
     @classmethod
     def available_for_profile(cls, profile):
         today = timezone.now().date()
-        return cls.objects.filter(profile=profile, is_booked=False, date__gte=today)
+        return cls.objects.filter(cls.bookable(), profile=profile, date__gte=today)
+
+    @staticmethod
+    def bookable():
+        """Free slots, including ones whose checkout hold has lapsed."""
+        return models.Q(is_booked=False) | models.Q(held_until__lte=timezone.now())
 
 class Booking(models.Model):
     patient = models.ForeignKey(
@@ -54,3 +64,53 @@ class Booking(models.Model):
     @property
     def specialist(self):
         return self.appointment.profile
+
+
+
+class CheckoutAttempt(models.Model):
+    """
+    One row per client idempotency key, so a retried checkout returns the
+    Stripe session created the first time instead of opening another one.
+    """
+    user = models.ForeignKey("auth.User", related_name="checkout_attempts", on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    appointment = models.ForeignKey(Appointment, related_name="checkout_attempts", on_delete=models.CASCADE)
+    session_id = models.CharField(max_length=255, blank=True, default="")
+    url = models.URLField(max_length=2000, blank=True, default="")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key"], name="appointments_checkout_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.key} -> {self.session_id or 'pending'}"
+
+
+class SpecialistStats(models.Model):
+    """
+    Nightly snapshot of one specialist's appointment figures for a week or
+    month bucket, written by the ``refresh_specialist_stats`` command so the
+    dashboard does not aggregate live.
+    """
+    PERIOD_CHOICES = [("week", "Week"), ("month", "Month")]
+
+    profile = models.ForeignKey("account.Profile", related_name="stats", on_delete=models.CASCADE)
+    period = models.CharField(max_length=5, choices=PERIOD_CHOICES)
+    bucket = models.DateField()
+    booked = models.PositiveIntegerField(default=0)
+    available = models.PositiveIntegerField(default=0)
+    past = models.PositiveIntegerField(default=0)
+    paid = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        ordering = ["bucket"]
+        constraints = [
+            models.UniqueConstraint(fields=["profile", "period", "bucket"], name="appointments_stats_bucket"),
+        ]
+
+    def __str__(self):
+        return f"{self.profile_id} {self.period} {self.bucket}"
@@ -0,0 +1,46 @@
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+
+from account.models import Profile, RoleChoices
+from .models import Appointment
+
+
+def matching_slots(date_from=None, date_to=None, time_from=None, time_to=None):
+    """
+    Bookable slots inside the requested date range and time-of-day window,
+    earliest first. Past dates are never returned.
+    """
+    today = timezone.now().date()
+    slots = Appointment.objects.filter(Appointment.bookable(), date__gte=max(date_from or today, today))
+    if date_to:
+        slots = slots.filter(date__lte=date_to)
+    if time_from:
+        slots = slots.filter(start_time__gte=time_from)
+    if time_to:
+        slots = slots.filter(end_time__lte=time_to)
+    return slots.order_by("date", "start_time")
+
+
+def next_available_by_specialist(speciality=None, country=None, min_price=None, max_price=None, **slot_filters):
+    """
+    Specialists matching the profile filters that have at least one slot in
+    ``matching_slots(**slot_filters)``, annotated with that earliest slot's
+    ``next_slot_id``, ``next_date`` and ``next_start``. Each annotation is a
+    correlated lookup on the ``(profile, date, start_time)`` unique index.
+    """
+    specialists = Profile.objects.select_related("user").filter(role=RoleChoices.SPECIALIST)
+    if speciality:
+        specialists = specialists.filter(speciality=speciality)
+    if country:
+        specialists = specialists.filter(country__iexact=country)
+    if min_price is not None:
+        specialists = specialists.filter(price_per_hour__gte=min_price)
+    if max_price is not None:
+        specialists = specialists.filter(price_per_hour__lte=max_price)
+
+    first_slot = matching_slots(**slot_filters).filter(profile=OuterRef("pk"))[:1]
+    return specialists.annotate(
+        next_slot_id=Subquery(first_slot.values("id")),
+        next_date=Subquery(first_slot.values("date")),
+        next_start=Subquery(first_slot.values("start_time")),
+    ).filter(next_slot_id__isnull=False)
@@ -1,6 +1,10 @@
+from decimal import Decimal
+from django.db import transaction
 from rest_framework import serializers
+from .booking import SlotUnavailable, claim_slot
 from .models import Appointment, Booking
-from account.models import Profile
+from account.models import Profile, SpecialtyChoices
+from lavender.images import RenditionImageField
 
 
 class AppointmentSerializer(serializers.ModelSerializer):
@@ -15,6 +19,41 @@ class AppointmentSerializer(serializers.ModelSerializer):
         fields = ["id", "date", "start_time", "end_time", "price", "is_booked"]
 
 
+class AvailabilitySearchSerializer(serializers.Serializer):
+    """Query parameters of the cross-specialist availability search."""
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    time_from = serializers.TimeField(required=False)
+    time_to = serializers.TimeField(required=False)
+    speciality = serializers.ChoiceField(choices=SpecialtyChoices.choices, required=False)
+    country = serializers.CharField(required=False)
+    min_price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=Decimal("0"), required=False)
+    max_price = serializers.DecimalField(max_digits=6, decimal_places=2, min_value=Decimal("0"), required=False)
+
+    def validate(self, data):
+        for low, high in (("date_from", "date_to"), ("time_from", "time_to"), ("min_price", "max_price")):
+            if data.get(low) is not None and data.get(high) is not None and data[low] > data[high]:
+                raise serializers.ValidationError({high: f"Must not be before {low}."})
+        return data
+
+
+class SlotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Appointment
+        fields = ["id", "date", "start_time", "end_time"]
+
+
+class SpecialistAvailabilitySerializer(serializers.ModelSerializer):
+    """A specialist with the earliest slot matching an availability search."""
+    name = serializers.CharField(source="user.get_full_name", read_only=True)
+    profile_pic_url = RenditionImageField("profile_pic", "profile_pic_renditions")
+    next_slot = SlotSerializer(read_only=True)
+
+    class Meta:
+        model = Profile
+        fields = ["id", "name", "profile_pic_url", "speciality", "country", "price_per_hour", "next_slot"]
+
+
 class AvailabilitySerializer(serializers.ModelSerializer):
     class Meta:
         model = Profile
@@ -27,9 +66,22 @@ class AvailabilitySerializer(serializers.ModelSerializer):
         instance.save()
         return instance
 
+class AnalyticsBucketSerializer(serializers.Serializer):
+    bucket = serializers.DateField()
+    booked = serializers.IntegerField()
+    available = serializers.IntegerField()
+    past = serializers.IntegerField()
+    paid = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+
+
 class AppointmentAnalyticsSerializer(serializers.Serializer):
     prev_count = serializers.IntegerField()
     available_count = serializers.IntegerField()
+    booked_count = serializers.IntegerField()
+    paid_count = serializers.IntegerField()
+    revenue = serializers.DecimalField(max_digits=12, decimal_places=2)
+    buckets = AnalyticsBucketSerializer(many=True, required=False)
     prev_appointments = AppointmentSerializer(many=True)
     available_appointments = AppointmentSerializer(many=True)
 
@@ -61,6 +113,8 @@ class BookingSerializer(serializers.ModelSerializer):
             "booked_at",
         ]
         read_only_fields = ["patient", "is_paid", "booked_at"]
+        # availability is decided by claim_slot, which can take over a lapsed hold
+        extra_kwargs = {"appointment": {"validators": []}}
 
     def get_specialist(self, obj):
         """Return specialist basic info (id + email)."""
@@ -81,12 +135,9 @@ class BookingSerializer(serializers.ModelSerializer):
 
         appointment = validated_data["appointment"]
 
-        if appointment.is_booked:
-            raise serializers.ValidationError("This appointment is already booked.")
-
-        # mark appointment as booked
-        appointment.is_booked = True
-        appointment.save()
-
-        booking = super().create(validated_data)
-        return booking
+        # claim the slot and create the booking atomically
+        try:
+            with transaction.atomic():
+                return claim_slot(appointment.pk, validated_data["patient"])
+        except SlotUnavailable as exc:
+            raise serializers.ValidationError(str(exc))
@@ -1,3 +1,259 @@
-from django.test import TestCase
+import threading
+from datetime import date, time, timedelta
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import stripe
+
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .booking import SlotUnavailable, claim_slot, release_expired_holds
+from .models import Appointment, Booking, CheckoutAttempt
+from .utils import generate_slots_for_profile
+
+
+def create_profile(username, role):
+    user = User.objects.create_user(username=username, email=f"{username}@example.com")
+    user.profile.role = role
+    user.profile.save()
+    return user.profile
+
+
+def create_slot(profile, hour=9):
+    return Appointment.objects.create(
+        profile=profile, date=date.today() + timedelta(days=1), start_time=time(hour), end_time=time(hour + 1)
+    )
+
+
+class SlotGenerationTests(TestCase):
+    def setUp(self):
+        self.profile = create_profile("specialist", "specialist")
+        self.profile.working_days = ["Monday", "Wednesday"]
+        self.profile.start_time = time(9)
+        self.profile.end_time = time(12)
+        self.profile.save()
+
+    def test_reports_inserted_and_deleted_slots(self):
+        self.assertEqual(generate_slots_for_profile(self.profile), (6, 0))
+        self.assertEqual(generate_slots_for_profile(self.profile), (0, 0))
+
+        self.profile.end_time = time(11)
+        self.profile.save()
+        self.assertEqual(generate_slots_for_profile(self.profile), (0, 2))
+        self.assertEqual(Appointment.objects.filter(profile=self.profile).count(), 4)
+
+
+class ClaimSlotTests(TestCase):
+    def setUp(self):
+        self.slot = create_slot(create_profile("specialist", "specialist"))
+        self.first = create_profile("first", "patient")
+        self.second = create_profile("second", "patient")
+
+    def claim(self, patient, **kwargs):
+        with transaction.atomic():
+            return claim_slot(self.slot.pk, patient, **kwargs)
+
+    def test_second_claim_on_a_slot_loses(self):
+        booking = self.claim(self.first)
+        with self.assertRaises(SlotUnavailable):
+            self.claim(self.second)
+        self.assertEqual(list(Booking.objects.values_list("pk", "patient")), [(booking.pk, self.first.pk)])
+
+    def test_lapsed_hold_can_be_taken_over(self):
+        self.claim(self.first, hold=True)
+        Appointment.objects.filter(pk=self.slot.pk).update(held_until=timezone.now() - timedelta(minutes=1))
+        booking = self.claim(self.second, hold=True)
+        self.assertEqual(list(Booking.objects.values_list("pk", flat=True)), [booking.pk])
+
+    def test_lapsed_hold_with_a_checkout_waits_for_release(self):
+        booking = self.claim(self.first, hold=True)
+        Booking.objects.filter(pk=booking.pk).update(payment_reference="cs_test")
+        Appointment.objects.filter(pk=self.slot.pk).update(held_until=timezone.now() - timedelta(minutes=1))
+        with self.assertRaises(SlotUnavailable):
+            self.claim(self.second, hold=True)
+        self.assertTrue(Booking.objects.filter(pk=booking.pk).exists())
+
+
+@skipUnlessDBFeature("has_select_for_update")
+class ConcurrentClaimTests(TransactionTestCase):
+    def test_concurrent_claims_have_one_winner(self):
+        slot = create_slot(create_profile("specialist", "specialist"))
+        patients = [create_profile(f"patient{i}", "patient") for i in range(4)]
+        barrier = threading.Barrier(len(patients))
+        results = []
+
+        def claim(patient):
+            barrier.wait()
+            try:
+                with transaction.atomic():
+                    claim_slot(slot.pk, patient, hold=True)
+                results.append(True)
+            except SlotUnavailable:
+                results.append(False)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=claim, args=(patient,)) for patient in patients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(results), [False, False, False, True])
+        self.assertEqual(Booking.objects.filter(appointment=slot).count(), 1)
+
+
+class CheckoutRetryTests(TestCase):
+    def setUp(self):
+        self.slot = create_slot(create_profile("specialist", "specialist"))
+        self.patient = create_profile("patient", "patient")
+        self.client = APIClient()
+        self.client.force_authenticate(self.patient.user)
+        self.session = SimpleNamespace(id="cs_test", url="https://checkout.stripe.test/cs_test")
+
+    def checkout(self):
+        with mock.patch("stripe.checkout.Session.create", return_value=self.session) as create:
+            response = self.client.post(
+                f"/api/v1/appointments/checkout/{self.slot.pk}", HTTP_IDEMPOTENCY_KEY="retry-key"
+            )
+        return response, create
+
+    def test_retry_returns_the_saved_session(self):
+        first, _ = self.checkout()
+        second, create = self.checkout()
+        self.assertEqual(first.json()["url"], self.session.url)
+        self.assertEqual(second.json()["url"], self.session.url)
+        create.assert_not_called()
+
+    def test_retry_resumes_an_attempt_that_never_saved_its_session(self):
+        # the first request held the slot, then died before storing the session
+        with transaction.atomic():
+            booking = claim_slot(self.slot.pk, self.patient, hold=True)
+        CheckoutAttempt.objects.create(user=self.patient.user, key="retry-key", appointment=self.slot)
+
+        response, create = self.checkout()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["url"], self.session.url)
+        self.assertEqual(
+            create.call_args.kwargs["idempotency_key"], f"appointment-checkout-{self.patient.user.id}-retry-key"
+        )
+        self.assertEqual(create.call_args.kwargs["metadata"]["booking_id"], str(booking.pk))
+        self.assertEqual(Booking.objects.get().payment_reference, "cs_test")
+        self.assertEqual(CheckoutAttempt.objects.get().url, self.session.url)
+
+
+def stripe_session(session_id, status="complete", payment_status="paid"):
+    return stripe.checkout.Session.construct_from(
+        {"id": session_id, "status": status, "payment_status": payment_status}, "sk_test"
+    )
+
+
+class PaymentConfirmationTests(TestCase):
+    def setUp(self):
+        self.slot = create_slot(create_profile("specialist", "specialist"))
+        self.patient = create_profile("patient", "patient")
+        with transaction.atomic():
+            self.booking = claim_slot(self.slot.pk, self.patient, hold=True)
+        Booking.objects.filter(pk=self.booking.pk).update(payment_reference="cs_test")
+
+    def lapse_hold(self):
+        Appointment.objects.filter(pk=self.slot.pk).update(held_until=timezone.now() - timedelta(minutes=1))
+
+    def webhook(self, session):
+        event = {"type": "checkout.session.completed", "data": {"object": session}}
+        with mock.patch("stripe.Webhook.construct_event", return_value=event):
+            return self.client.post("/api/v1/payment/webhook/", data="{}", content_type="application/json")
+
+    def assert_paid(self):
+        self.booking.refresh_from_db()
+        self.slot.refresh_from_db()
+        self.assertTrue(self.booking.is_paid)
+        self.assertTrue(self.slot.is_booked)
+        self.assertIsNone(self.slot.held_until)
+
+    def test_webhook_rejects_bad_signatures(self):
+        response = self.client.post(
+            "/api/v1/payment/webhook/", data="{}", content_type="application/json", HTTP_STRIPE_SIGNATURE="t=1,v1=bad"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Booking.objects.get().is_paid)
+
+    def test_delivering_the_webhook_twice_confirms_once(self):
+        with mock.patch("stripe.checkout.Session.retrieve") as retrieve:
+            self.assertEqual(self.webhook(stripe_session("cs_test")).status_code, 200)
+            self.assertEqual(self.webhook(stripe_session("cs_test")).status_code, 200)
+        retrieve.assert_not_called()
+        self.assert_paid()
+        self.assertEqual(Booking.objects.count(), 1)
+
+    def test_unpaid_session_does_not_confirm(self):
+        self.webhook(stripe_session("cs_test", payment_status="unpaid"))
+        self.assertFalse(Booking.objects.get().is_paid)
+
+    def test_payment_after_the_hold_lapsed_but_before_release(self):
+        self.lapse_hold()
+        self.webhook(stripe_session("cs_test"))
+        self.assert_paid()
+        self.assertEqual(release_expired_holds(), 0)
+
+    def test_release_confirms_a_late_payment_instead_of_freeing_the_slot(self):
+        self.lapse_hold()
+        with mock.patch("stripe.checkout.Session.retrieve", return_value=stripe_session("cs_test")), \
+                mock.patch("stripe.checkout.Session.expire") as expire:
+            self.assertEqual(release_expired_holds(), 0)
+        expire.assert_not_called()
+        self.assert_paid()
+
+    def test_release_expires_open_sessions_and_frees_the_slot(self):
+        self.lapse_hold()
+        open_session = stripe_session("cs_test", status="open", payment_status="unpaid")
+        expired = stripe_session("cs_test", status="expired", payment_status="unpaid")
+        with mock.patch("stripe.checkout.Session.retrieve", return_value=open_session), \
+                mock.patch("stripe.checkout.Session.expire", return_value=expired) as expire:
+            self.assertEqual(release_expired_holds(), 1)
+        expire.assert_called_once_with("cs_test")
+        self.assertFalse(Booking.objects.exists())
+        self.slot.refresh_from_db()
+        self.assertFalse(self.slot.is_booked)
+
+    def test_release_keeps_the_hold_when_stripe_is_unreachable(self):
+        self.lapse_hold()
+        with mock.patch("stripe.checkout.Session.retrieve", side_effect=stripe.error.APIConnectionError("down")), \
+                self.assertLogs("appointments.booking", "ERROR"):
+            self.assertEqual(release_expired_holds(), 0)
+        self.assertTrue(Booking.objects.filter(pk=self.booking.pk).exists())
+
+    def test_payment_for_a_released_booking_is_not_confirmed(self):
+        Booking.objects.filter(pk=self.booking.pk).delete()
+        with self.assertLogs("appointments.booking", "WARNING"):
+            self.assertEqual(self.webhook(stripe_session("cs_test")).status_code, 200)
+        self.assertFalse(Booking.objects.exists())
+
+
+class AvailabilitySearchTests(TestCase):
+    def setUp(self):
+        self.specialists = [create_profile(f"specialist{i}", "specialist") for i in range(2)]
+        self.slots = [create_slot(specialist, hour=9 + i) for i, specialist in enumerate(self.specialists)]
+
+    def test_lists_each_specialists_next_slot(self):
+        response = self.client.get("/api/v1/appointments/search/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 2)
+
+    def test_slot_deleted_between_queries_is_skipped(self):
+        in_bulk = Appointment.objects.in_bulk
+
+        def delete_then_load(ids, **kwargs):
+            Appointment.objects.filter(pk=self.slots[0].pk).delete()
+            return in_bulk(ids, **kwargs)
+
+        with mock.patch.object(Appointment.objects, "in_bulk", side_effect=delete_then_load):
+            response = self.client.get("/api/v1/appointments/search/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["results"]), 1)
@@ -1,11 +1,12 @@
 from django.urls import path
-from .views import (AppointmentListView, BookingCreateView, 
+from .views import (AppointmentListView, AvailabilitySearchView, BookingCreateView, 
                     SpecialistAnalyticsView, AvailabilityUpdateView,
-                    CheckoutSessionView, SuccessfulPaymentView,
+                    CheckoutSessionView, SuccessfulPaymentView, StripeWebhookView,
                       BookingListView, AppointmentCreateView)
 
 urlpatterns = [
     path("appointments/", AppointmentListView.as_view(), name="appointment-list"),
+    path("appointments/search/", AvailabilitySearchView.as_view(), name="appointment-search"),
     path("appointments/analytics/", SpecialistAnalyticsView.as_view(), name="appointment-analytics"),
     path("appointments/availability/", AvailabilityUpdateView.as_view(), name="update-availability"),
     path("appointments/create/", AppointmentCreateView.as_view(), name="appointment-create"),
@@ -15,5 +16,6 @@ urlpatterns = [
 
     path('appointments/checkout/<int:appointment_id>', CheckoutSessionView.as_view(), name='checkout'),
     path('payment/success/', SuccessfulPaymentView.as_view(), name='successful_payment'),
+    path('payment/webhook/', StripeWebhookView.as_view(), name='stripe_webhook'),
 
 ]
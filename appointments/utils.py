@@ -1,19 +1,22 @@
 from datetime import timedelta, datetime
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 import calendar
+from account.models import Profile
 from appointments.models import Appointment
+from jobs.queue import enqueue
 
-def generate_slots_for_profile(profile, weeks_ahead=1):
+
+def desired_slots(profile, weeks_ahead, slot_minutes, today):
     """
-    Regenerate all slots for the given profile for the next `weeks_ahead` weeks.
-    Deletes old future slots first.
+    The slots the profile's working days and hours call for, as
+    ``{(date, start_time): end_time}``.
     """
-    today = timezone.now().date()
-
-    #  1. Delete future slots
-    Appointment.objects.filter(profile=profile, date__gte=today, is_booked=False).delete()
-
-    #  2. Regenerate fresh ones
+    slots = {}
+    if not profile.start_time or not profile.end_time:
+        return slots
+    length = timedelta(minutes=slot_minutes)
     for week in range(weeks_ahead):
         for day_name in profile.working_days:
             weekday_index = list(calendar.day_name).index(day_name)
@@ -24,12 +27,70 @@ def generate_slots_for_profile(profile, weeks_ahead=1):
             end = datetime.combine(target_date, profile.end_time)
 
             slot_start = start
-            while slot_start + timedelta(hours=1) <= end:
-                slot_end = slot_start + timedelta(hours=1)
-                Appointment.objects.get_or_create(
-                    profile=profile,
-                    date=target_date,
-                    start_time=slot_start.time(),
-                    end_time=slot_end.time(),
-                )
+            while slot_start + length <= end:
+                slot_end = slot_start + length
+                slots[(target_date, slot_start.time())] = slot_end.time()
                 slot_start = slot_end
+    return slots
+
+
+def generate_slots_for_profile(profile, weeks_ahead=1, slot_minutes=None):
+    """
+    Bring the profile's future slots in line with its availability for the
+    next `weeks_ahead` weeks: one read of the existing future slots, one
+    delete of the unbooked ones that are no longer wanted and one bulk insert
+    of the missing ones. Booked slots are never touched.
+    Returns ``(created, deleted)``.
+    """
+    today = timezone.now().date()
+    wanted = desired_slots(profile, weeks_ahead, slot_minutes or settings.APPOINTMENT_SLOT_MINUTES, today)
+
+    with transaction.atomic():
+        # runs for the same profile queue up here, so nothing else rewrites
+        # its slots between the read below and the insert
+        Profile.objects.select_for_update().only("pk").filter(pk=profile.pk).first()
+        future = Appointment.objects.filter(profile=profile, date__gte=today)
+        existing = future.values_list("id", "date", "start_time", "end_time", "is_booked")
+        stale, present = [], set()
+        for slot_id, date, start_time, end_time, is_booked in existing:
+            key = (date, start_time)
+            if is_booked or wanted.get(key) == end_time:
+                present.add(key)
+            else:
+                stale.append(slot_id)
+
+        deleted = Appointment.objects.filter(id__in=stale).delete()[0] if stale else 0
+        missing = {key: end_time for key, end_time in wanted.items() if key not in present}
+        created = 0
+        if missing:
+            Appointment.objects.bulk_create(
+                [
+                    Appointment(profile=profile, date=date, start_time=start_time, end_time=end_time)
+                    for (date, start_time), end_time in missing.items()
+                ],
+                ignore_conflicts=True,
+                batch_size=500,
+            )
+            # bulk_create returns every object even when a conflict skipped
+            # it, so count the missing keys that exist now
+            created = len(missing.keys() & set(future.values_list("date", "start_time")))
+    return created, deleted
+
+
+def regenerate_slots(profile_id, weeks_ahead=1, slot_minutes=None):
+    """Job entry point for `schedule_slot_generation`."""
+    profile = Profile.objects.filter(pk=profile_id).first()
+    if profile is not None:
+        generate_slots_for_profile(profile, weeks_ahead, slot_minutes)
+
+
+def schedule_slot_generation(profile, weeks_ahead=1):
+    """
+    Regenerate slots now, or in the background when
+    ``APPOINTMENT_SLOTS_IN_BACKGROUND`` is set so availability saves return
+    immediately.
+    """
+    if settings.APPOINTMENT_SLOTS_IN_BACKGROUND:
+        enqueue("appointments.utils.regenerate_slots", profile_id=profile.pk, weeks_ahead=weeks_ahead)
+    else:
+        generate_slots_for_profile(profile, weeks_ahead=weeks_ahead)
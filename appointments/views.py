@@ -1,11 +1,16 @@
 from rest_framework import generics, permissions
-from .models import Appointment, Booking
+from .analytics import PERIODS, snapshot_start, specialist_buckets, specialist_summary
+from .models import Appointment, Booking, CheckoutAttempt, SpecialistStats
+from .booking import SlotUnavailable, claim_slot, confirm_checkout, record_checkout, release_booking
+from .search import next_available_by_specialist
 from .serializers import AppointmentSerializer, AvailabilitySerializer, BookingSerializer,AppointmentAnalyticsSerializer
+from .serializers import AvailabilitySearchSerializer, SpecialistAvailabilitySerializer
+from lavender.pagination import InvalidCursor, get_page_size, paginate_keyset
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .utils import generate_slots_for_profile  
+from .utils import schedule_slot_generation
 from account.permissions import IsSpecialist
 from account.models import Profile 
 from rest_framework.response import Response
@@ -15,13 +20,58 @@ from django.conf import settings
 from django.views.generic import TemplateView
 from rest_framework.views import APIView
 from decimal import Decimal, InvalidOperation
+from django.db import transaction
+from django.utils import timezone
+import logging
+import uuid
 stripe.api_key = settings.STRIPE_SECRET_KEY
+logger = logging.getLogger(__name__)
 
 class AppointmentListView(generics.ListAPIView):
-    queryset = Appointment.objects.filter(is_booked=False)
     serializer_class = AppointmentSerializer
     permission_classes = [permissions.AllowAny]
 
+    def get_queryset(self):
+        today = timezone.now().date()
+        return (
+            Appointment.objects.filter(Appointment.bookable(), date__gte=today)
+            .select_related("profile")
+            .order_by("date", "start_time")
+        )
+
+
+class AvailabilitySearchView(APIView):
+    """
+    Next available slot per specialist, soonest first. Slots can be narrowed
+    with ``date_from``/``date_to`` and a ``time_from``/``time_to`` window,
+    specialists with ``speciality``, ``country`` and ``min_price``/``max_price``.
+    ``?cursor=`` continues from the previous page.
+    """
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        params = AvailabilitySearchSerializer(data=request.query_params)
+        if not params.is_valid():
+            return Response(params.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        page_size = get_page_size(request, settings.APPOINTMENT_SEARCH_PAGE_SIZE, settings.APPOINTMENT_SEARCH_MAX_PAGE_SIZE)
+        specialists = next_available_by_specialist(**params.validated_data)
+        try:
+            specialists, next_cursor = paginate_keyset(
+                specialists, ["next_date", "next_start", "id"], request.query_params.get("cursor"), page_size,
+                descending=False,
+            )
+        except (InvalidCursor, ValueError):
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+        slots = Appointment.objects.in_bulk([specialist.next_slot_id for specialist in specialists])
+        # a slot deleted since the ranking query drops its specialist from the page
+        specialists = [specialist for specialist in specialists if specialist.next_slot_id in slots]
+        for specialist in specialists:
+            specialist.next_slot = slots[specialist.next_slot_id]
+        serializer = SpecialistAvailabilitySerializer(specialists, many=True, context={"request": request})
+        return Response({"results": serializer.data, "next_cursor": next_cursor}, status=status.HTTP_200_OK)
+
 class AvailabilityUpdateView(generics.RetrieveUpdateAPIView):
     serializer_class = AvailabilitySerializer
     permission_classes = [permissions.IsAuthenticated, IsSpecialist]
@@ -31,22 +81,40 @@ class AvailabilityUpdateView(generics.RetrieveUpdateAPIView):
 
     def perform_update(self, serializer):
         profile = serializer.save()
-        generate_slots_for_profile(profile, weeks_ahead=4)
+        schedule_slot_generation(profile, weeks_ahead=4)
 
 class SpecialistAnalyticsView(APIView):
+    """
+    Appointment figures of the requesting specialist. ``?period=week`` or
+    ``?period=month`` adds time buckets, read from the nightly
+    ``SpecialistStats`` snapshot when one exists.
+    """
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
         profile = request.user.profile
-        prev_appointments = Appointment.previous_for_profile(profile)
-        available_appointments = Appointment.available_for_profile(profile)
+        period = request.query_params.get("period")
+        if period and period not in PERIODS:
+            return Response({"error": f"period must be one of {', '.join(sorted(PERIODS))}."}, status=400)
 
-        serializer = AppointmentAnalyticsSerializer({
-            "prev_count": prev_appointments.count(),
-            "available_count": available_appointments.count(),
+        summary = specialist_summary(profile)
+        prev_appointments = Appointment.previous_for_profile(profile).select_related("profile")
+        available_appointments = Appointment.available_for_profile(profile).select_related("profile")
+
+        data = {
+            "prev_count": summary["past"],
+            "available_count": summary["available"],
+            "booked_count": summary["booked"],
+            "paid_count": summary["paid"],
+            "revenue": summary["revenue"],
             "prev_appointments": prev_appointments[:10],
             "available_appointments": available_appointments[:10],
-        })
+        }
+        if period:
+            data["buckets"] = SpecialistStats.objects.filter(profile=profile, period=period).values() or (
+                specialist_buckets(profile, period, since=snapshot_start(period, settings.APPOINTMENT_STATS_MONTHS))
+            )
+        serializer = AppointmentAnalyticsSerializer(data)
         return Response(serializer.data)
 
 class AppointmentCreateView(generics.CreateAPIView):
@@ -78,13 +146,53 @@ class BookingListView(generics.ListAPIView):
 class SuccessfulPaymentView(TemplateView):
     permission_classes = [AllowAny]
     template_name = 'index.html'
-    
+
+    def get(self, request, *args, **kwargs):
+        # Stripe appends the checkout session id; confirm the booking it paid for.
+        session_id = request.GET.get("session_id")
+        if session_id:
+            try:
+                confirm_checkout(session_id)
+            except stripe.error.StripeError:
+                logger.exception("Could not confirm checkout session %s", session_id)
+        return super().get(request, *args, **kwargs)
+
+
+class StripeWebhookView(APIView):
+    """
+    Confirm bookings from Stripe's checkout events, for patients who pay but
+    never come back through the success redirect.
+    """
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def post(self, request):
+        try:
+            event = stripe.Webhook.construct_event(
+                request.body, request.headers.get("Stripe-Signature", ""), settings.STRIPE_WEBHOOK_SECRET
+            )
+        except (ValueError, stripe.error.SignatureVerificationError):
+            return Response({"error": "Invalid webhook."}, status=400)
+        if event["type"] in ("checkout.session.completed", "checkout.session.async_payment_succeeded"):
+            session = event["data"]["object"]
+            confirm_checkout(session["id"], session)
+        return Response(status=200)
+
+
 class CheckoutSessionView(APIView):
+    """
+    Hold the slot, then open a Stripe checkout for it. Send an
+    ``Idempotency-Key`` header so retries return the same checkout URL
+    instead of creating another session; a retry whose first request never
+    saved its session picks up that request's hold. The booking stays
+    unpaid until Stripe redirects back with the session id or sends the
+    checkout webhook.
+    """
     permission_classes = [IsAuthenticated]
 
     def post(self, request, appointment_id):
         try:
-            appointment = Appointment.objects.get(id=appointment_id, is_booked=False)
+            appointment = Appointment.objects.select_related("profile__user").get(id=appointment_id)
 
             MAX_STRIPE_AMOUNT = Decimal("999999.99")
             quantity = int(request.data.get("quantity", 1))
@@ -102,6 +210,33 @@ class CheckoutSessionView(APIView):
             except (InvalidOperation, ValueError, TypeError):
                 return Response({"error": "Invalid price format."}, status=400)
 
+            key = request.headers.get("Idempotency-Key") or request.data.get("idempotency_key") or uuid.uuid4().hex
+            attempt, created = record_checkout(request.user, key, appointment.id)
+            if not created:
+                if attempt.appointment_id != appointment.id:
+                    return Response({"error": "Idempotency key was used for another appointment."}, status=422)
+                if attempt.url:
+                    return Response({"status": "success", "url": attempt.url}, status=200)
+                # the request that recorded the key never saved its session
+                # (it died or Stripe timed out); carry on with its hold, and
+                # the same Stripe idempotency key returns any session it opened
+                booking = Booking.objects.filter(
+                    appointment_id=appointment.id, patient=request.user.profile, is_paid=False
+                ).first()
+            else:
+                booking = None
+
+            claimed = booking is None
+            if claimed:
+                try:
+                    with transaction.atomic():
+                        booking = claim_slot(appointment.id, request.user.profile, hold=True)
+                except SlotUnavailable as exc:
+                    if not created:
+                        return Response({"error": "Checkout is already in progress."}, status=409)
+                    attempt.delete()
+                    return Response({"error": str(exc)}, status=409)
+
             # Stripe line items
             line_items = [{
                 "price_data": {
@@ -117,29 +252,33 @@ class CheckoutSessionView(APIView):
 
             session_metadata = {
                 "appointment_id": str(appointment.id),
+                "booking_id": str(booking.id),
                 "user_id": str(request.user.id)
             }
 
-            checkout_session = stripe.checkout.Session.create(
-                payment_method_types=["card"],
-                line_items=line_items,
-                mode="payment",
-                metadata=session_metadata,
-                success_url=settings.SITE_URL + "api/v1/payment/success/",
-                cancel_url=settings.SITE_URL + "api/v1/payment/cancel/"
-            )
+            try:
+                checkout_session = stripe.checkout.Session.create(
+                    payment_method_types=["card"],
+                    line_items=line_items,
+                    mode="payment",
+                    metadata=session_metadata,
+                    success_url=settings.SITE_URL + "api/v1/payment/success/?session_id={CHECKOUT_SESSION_ID}",
+                    cancel_url=settings.SITE_URL + "api/v1/payment/cancel/",
+                    idempotency_key=f"appointment-checkout-{request.user.id}-{key}",
+                )
+            except stripe.error.StripeError:
+                if claimed:
+                    release_booking(booking)
+                if created:
+                    attempt.delete()
+                raise
 
-            # 👉 Save pending booking
-            booking = Booking.objects.create(
-                patient=request.user.profile,
-                appointment=appointment,
-                is_paid= True,
-                payment_reference=checkout_session.id
+            # 👉 Booking stays unpaid until the success redirect or the webhook confirms it
+            Booking.objects.filter(pk=booking.pk).update(payment_reference=checkout_session.id)
+            CheckoutAttempt.objects.filter(pk=attempt.pk).update(
+                session_id=checkout_session.id, url=checkout_session.url
             )
 
-            appointment.is_booked = True
-            appointment.save()
-
             return Response({
                 "status": "success",
                 "url": checkout_session.url,
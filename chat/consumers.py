@@ -0,0 +1,69 @@
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from .realtime import get_channel_layer
+
+
+@sync_to_async
+def authenticate(token):
+    auth = JWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(token))
+    except (InvalidToken, AuthenticationFailed):
+        return None
+
+
+def is_ping(text):
+    try:
+        return json.loads(text or "").get("type") == "ping"
+    except (ValueError, AttributeError):
+        return False
+
+
+async def chat_websocket(scope, receive, send):
+    """
+    Raw ASGI WebSocket endpoint that pushes ``chat.message`` and ``chat.read``
+    events to the authenticated user. The SimpleJWT access token is passed
+    as ``?token=`` because browsers cannot set headers on a WebSocket.
+    """
+    event = await receive()
+    if event["type"] != "websocket.connect":
+        return
+
+    query = parse_qs(scope.get("query_string", b"").decode())
+    token = (query.get("token") or [""])[0]
+    user = await authenticate(token) if token else None
+    if user is None:
+        await send({"type": "websocket.close", "code": 4401})
+        return
+
+    await send({"type": "websocket.accept"})
+    loop = asyncio.get_running_loop()
+    queue = asyncio.Queue(maxsize=settings.CHAT_WEBSOCKET_QUEUE_SIZE)
+    layer = get_channel_layer()
+    layer.subscribe(user.id, loop, queue)
+
+    incoming = asyncio.ensure_future(receive())
+    outgoing = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({incoming, outgoing}, return_when=asyncio.FIRST_COMPLETED)
+            if outgoing in done:
+                await send({"type": "websocket.send", "text": json.dumps(outgoing.result(), default=str)})
+                outgoing = asyncio.ensure_future(queue.get())
+            if incoming in done:
+                event = incoming.result()
+                if event["type"] == "websocket.disconnect":
+                    break
+                if event["type"] == "websocket.receive" and is_ping(event.get("text")):
+                    await send({"type": "websocket.send", "text": json.dumps({"type": "pong"})})
+                incoming = asyncio.ensure_future(receive())
+    finally:
+        layer.unsubscribe(user.id, loop, queue)
+        incoming.cancel()
+        outgoing.cancel()
@@ -0,0 +1,62 @@
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from chat.models import ChatBubble
+from chat.serializers import MessageSerializer, serialize_compact
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare payload size, query count and serialization time of the nested and compact "
+        "chat message formats. Seeds a thread inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--messages", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                a, b = self.seed(options["messages"])
+                self.report(a, b, options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, count):
+        tag = uuid.uuid4().hex[:8]
+        a = User.objects.create(username=f"bench-{tag}-a", email=f"bench-{tag}-a@example.com")
+        b = User.objects.create(username=f"bench-{tag}-b", email=f"bench-{tag}-b@example.com")
+        ChatBubble.objects.bulk_create(
+            [ChatBubble(sender=a if i % 2 else b, receiver=b if i % 2 else a, message=f"message {i}") for i in range(count)],
+            batch_size=500,
+        )
+        return a, b
+
+    def report(self, a, b, repeat):
+        thread = ChatBubble.objects.filter(sender__in=[a, b], receiver__in=[a, b]).order_by("timestamp", "id")
+        formats = {
+            "nested (lazy users)": lambda: MessageSerializer(list(thread), many=True).data,
+            "nested (select_related)": lambda: MessageSerializer(list(thread.select_related("sender", "receiver")), many=True).data,
+            "compact (select_related)": lambda: dict(zip(
+                ("messages", "participants"), serialize_compact(list(thread.select_related("sender", "receiver")))
+            )),
+        }
+        for name, build in formats.items():
+            with CaptureQueriesContext(connection) as queries:
+                payload = JSONRenderer().render(build())
+            started = time.perf_counter()
+            for _ in range(repeat):
+                JSONRenderer().render(build())
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+            self.stdout.write(f"{name}: {len(payload) / 1024:.1f} KiB, {len(queries)} queries, {elapsed:.1f} ms")
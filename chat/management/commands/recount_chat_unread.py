@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F, Q
+from chat.models import Conversation
+
+
+class Command(BaseCommand):
+    help = "Recompute Conversation unread counters from unread messages and repair any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drifted rows.")
+
+    def handle(self, *args, **options):
+        actual_a = Conversation.actual_unread("user_a_id", "user_b_id")
+        actual_b = Conversation.actual_unread("user_b_id", "user_a_id")
+        drifted = Conversation.objects.annotate(actual_a=actual_a, actual_b=actual_b).filter(
+            ~Q(unread_a=F("actual_a")) | ~Q(unread_b=F("actual_b"))
+        )
+        count = drifted.count()
+
+        if count and not options["dry_run"]:
+            with transaction.atomic():
+                Conversation.objects.filter(pk__in=drifted.values("pk")).update(unread_a=actual_a, unread_b=actual_b)
+
+        if count:
+            verb = "Found" if options["dry_run"] else "Repaired"
+            self.stdout.write(self.style.WARNING(f"{verb} {count} conversations with drifted unread counts."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Conversation unread counts are in sync."))
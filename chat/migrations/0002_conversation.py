@@ -0,0 +1,53 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:30
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def build_conversations(apps, schema_editor):
+    ChatBubble = apps.get_model('chat', 'ChatBubble')
+    Conversation = apps.get_model('chat', 'Conversation')
+
+    conversations = {}
+    rows = ChatBubble.objects.order_by('id').values_list('id', 'sender_id', 'receiver_id', 'timestamp', 'is_read')
+    for message_id, sender_id, receiver_id, timestamp, is_read in rows.iterator(chunk_size=2000):
+        pair = (min(sender_id, receiver_id), max(sender_id, receiver_id))
+        conversation = conversations.setdefault(pair, Conversation(user_a_id=pair[0], user_b_id=pair[1]))
+        conversation.last_message_id = message_id
+        conversation.last_activity = timestamp
+        if not is_read:
+            if receiver_id == pair[0]:
+                conversation.unread_a += 1
+            else:
+                conversation.unread_b += 1
+    Conversation.objects.bulk_create(conversations.values(), batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Conversation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('last_activity', models.DateTimeField(default=django.utils.timezone.now)),
+                ('unread_a', models.PositiveIntegerField(default=0)),
+                ('unread_b', models.PositiveIntegerField(default=0)),
+                ('last_message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='chat.chatbubble')),
+                ('user_a', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_a', to=settings.AUTH_USER_MODEL)),
+                ('user_b', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='conversations_as_b', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user_a', '-last_activity'], name='chat_conv_a_activity'), models.Index(fields=['user_b', '-last_activity'], name='chat_conv_b_activity')],
+                'constraints': [models.UniqueConstraint(fields=('user_a', 'user_b'), name='chat_conversation_pair')],
+            },
+        ),
+        migrations.RunPython(build_conversations, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:33
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0002_conversation'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatbubble',
+            index=models.Index(fields=['sender', 'receiver', 'timestamp'], name='chat_bubble_pair_ts'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:35
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0003_message_history_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='chatbubble',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['receiver', 'sender'], name='chat_bubble_unread'),
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:36
+
+from django.db import migrations, models
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_read_upto(apps, schema_editor):
+    ChatBubble = apps.get_model('chat', 'ChatBubble')
+    Conversation = apps.get_model('chat', 'Conversation')
+
+    def newest_read(reader, other):
+        ids = ChatBubble.objects.filter(
+            receiver_id=OuterRef(reader), sender_id=OuterRef(other), is_read=True
+        ).values('receiver_id').annotate(upto=Max('id')).values('upto')
+        return Coalesce(Subquery(ids), 0)
+
+    Conversation.objects.update(
+        read_upto_a=newest_read('user_a_id', 'user_b_id'),
+        read_upto_b=newest_read('user_b_id', 'user_a_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chat', '0004_unread_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='conversation',
+            name='read_upto_a',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='conversation',
+            name='read_upto_b',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_read_upto, migrations.RunPython.noop),
+    ]
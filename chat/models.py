@@ -1,4 +1,7 @@
-from django.db import models
+from django.db import models, transaction
+from django.conf import settings
+from django.db.models import Case, Count, F, Max, OuterRef, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Greatest
 from django.contrib.auth.models import User
 from account.models import *
 from django.utils import timezone
@@ -13,6 +16,10 @@ class ChatBubble(models.Model):
     class Meta:
         ordering = ['timestamp']
         verbose_name_plural = "Messages"
+        indexes = [
+            models.Index(fields=['sender', 'receiver', 'timestamp'], name='chat_bubble_pair_ts'),
+            models.Index(fields=['receiver', 'sender'], name='chat_bubble_unread', condition=Q(is_read=False)),
+        ]
 
     def __str__(self):
         return f"{self.receiver} - {self.sender}"
@@ -44,4 +51,195 @@ class ReadReceipt(models.Model):
         ordering = ['-read_at']
 
     def __str__(self):
-        return f"{self.user.username} read message {self.message.id}"
\ No newline at end of file
+        return f"{self.user.username} read message {self.message.id}"
+
+
+class Conversation(models.Model):
+    """
+    One row per pair of users who have exchanged messages, kept up to date by
+    ``record_message``. ``user_a`` is always the participant with the lower id
+    so a pair maps to exactly one row.
+    """
+    user_a = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_as_a')
+    user_b = models.ForeignKey(User, on_delete=models.CASCADE, related_name='conversations_as_b')
+    last_message = models.ForeignKey(ChatBubble, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    last_activity = models.DateTimeField(default=timezone.now)
+    # messages not yet read by user_a / user_b
+    unread_a = models.PositiveIntegerField(default=0)
+    unread_b = models.PositiveIntegerField(default=0)
+    # id of the newest message user_a / user_b has read from the other side;
+    # everything sent to them up to it counts as read
+    read_upto_a = models.PositiveBigIntegerField(default=0)
+    read_upto_b = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user_a', 'user_b'], name='chat_conversation_pair'),
+        ]
+        indexes = [
+            models.Index(fields=['user_a', '-last_activity'], name='chat_conv_a_activity'),
+            models.Index(fields=['user_b', '-last_activity'], name='chat_conv_b_activity'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_a} - {self.user_b}"
+
+    @staticmethod
+    def pair(user_id, other_id):
+        return (user_id, other_id) if user_id < other_id else (other_id, user_id)
+
+    @staticmethod
+    def unread_field(user_a_id, reader_id):
+        return 'unread_a' if reader_id == user_a_id else 'unread_b'
+
+    @staticmethod
+    def read_upto_field(user_a_id, reader_id):
+        return 'read_upto_a' if reader_id == user_a_id else 'read_upto_b'
+
+    def read_upto(self, reader_id):
+        return getattr(self, self.read_upto_field(self.user_a_id, reader_id))
+
+    @classmethod
+    def between(cls, user_id, other_id):
+        user_a_id, user_b_id = cls.pair(user_id, other_id)
+        return cls.objects.filter(user_a_id=user_a_id, user_b_id=user_b_id).first()
+
+    @classmethod
+    def for_user(cls, user_id):
+        return cls.objects.filter(Q(user_a_id=user_id) | Q(user_b_id=user_id)).order_by('-last_activity')
+
+    @classmethod
+    def unread_for_user(cls, user_id):
+        """Conversations with unread messages for ``user_id``, annotated with ``unread`` and ``other_id``."""
+        return cls.objects.filter(
+            Q(user_a_id=user_id, unread_a__gt=0) | Q(user_b_id=user_id, unread_b__gt=0)
+        ).annotate(
+            unread=Case(When(user_a_id=user_id, then=F('unread_a')), default=F('unread_b')),
+            other_id=Case(When(user_a_id=user_id, then=F('user_b_id')), default=F('user_a_id')),
+        ).order_by('-last_activity')
+
+    @classmethod
+    def actual_unread(cls, reader, other):
+        """Correlated COUNT of unread ChatBubble rows, for repairing the counters."""
+        counts = ChatBubble.objects.filter(
+            receiver_id=OuterRef(reader), sender_id=OuterRef(other), is_read=False
+        ).values('receiver_id').annotate(total=Count('*')).values('total')
+        return Coalesce(Subquery(counts), 0)
+
+    @classmethod
+    def record_message(cls, message):
+        """Point the pair's conversation at ``message`` and bump the receiver's unread count."""
+        user_a_id, user_b_id = cls.pair(message.sender_id, message.receiver_id)
+        unread = cls.unread_field(user_a_id, message.receiver_id)
+        with transaction.atomic():
+            conversation, _ = cls.objects.get_or_create(user_a_id=user_a_id, user_b_id=user_b_id)
+            cls.objects.filter(pk=conversation.pk).update(
+                last_message=message,
+                last_activity=message.timestamp,
+                **{unread: F(unread) + 1},
+            )
+        return conversation
+
+    @classmethod
+    def mark_read(cls, reader_id, other_id):
+        """
+        Mark everything ``other_id`` sent to ``reader_id`` as read and move the
+        reader's watermark up to the newest of those messages. Per-message
+        ``ReadReceipt`` rows are only written with ``CHAT_PER_MESSAGE_RECEIPTS``.
+        Returns ``(number of messages, watermark or None)``.
+        """
+        user_a_id, user_b_id = cls.pair(reader_id, other_id)
+        unread = ChatBubble.objects.filter(sender_id=other_id, receiver_id=reader_id, is_read=False)
+        with transaction.atomic():
+            if settings.CHAT_PER_MESSAGE_RECEIPTS:
+                ids = list(unread.values_list('id', flat=True))
+                upto = max(ids, default=None)
+                ReadReceipt.objects.bulk_create(
+                    [ReadReceipt(message_id=message_id, user_id=reader_id) for message_id in ids],
+                    ignore_conflicts=True,
+                    batch_size=500,
+                )
+            else:
+                upto = unread.aggregate(upto=Max('id'))['upto']
+            if upto is None:
+                return 0, None
+            # bounded by the watermark so messages arriving meanwhile stay unread
+            count = unread.filter(id__lte=upto).update(is_read=True)
+            read_upto = cls.read_upto_field(user_a_id, reader_id)
+            unread_field = cls.unread_field(user_a_id, reader_id)
+            cls.objects.filter(user_a_id=user_a_id, user_b_id=user_b_id).update(**{
+                unread_field: Greatest(F(unread_field) - count, 0),
+                read_upto: Greatest(F(read_upto), upto),
+            })
+        return count, upto
+
+    @classmethod
+    def mark_last_messages_read(cls, reader_id, conversations):
+        """
+        Mark the last message of each of ``conversations`` read if ``reader_id``
+        received it. As with ``mark_read`` the reader's watermark moves up to
+        it, so everything the other side sent before it is marked read too.
+        Uses one UPDATE for the messages and one per side of the pair.
+        Returns ``(last message, number of messages marked)`` pairs.
+        """
+        unread = [
+            c for c in conversations
+            if c.last_message and c.last_message.receiver_id == reader_id and not c.last_message.is_read
+        ]
+        if not unread:
+            return []
+        bounds = Q()
+        for c in unread:
+            bounds |= Q(sender_id=c.last_message.sender_id, id__lte=c.last_message_id)
+        messages = ChatBubble.objects.filter(bounds, receiver_id=reader_id, is_read=False)
+        with transaction.atomic():
+            if settings.CHAT_PER_MESSAGE_RECEIPTS:
+                rows = list(messages.values_list('id', 'sender_id'))
+                counts = {}
+                for _, sender_id in rows:
+                    counts[sender_id] = counts.get(sender_id, 0) + 1
+                ReadReceipt.objects.bulk_create(
+                    [ReadReceipt(message_id=message_id, user_id=reader_id) for message_id, _ in rows],
+                    ignore_conflicts=True,
+                    batch_size=500,
+                )
+                ChatBubble.objects.filter(id__in=[message_id for message_id, _ in rows]).update(is_read=True)
+            else:
+                counts = dict(messages.order_by().values_list('sender_id').annotate(total=Count('*')))
+                messages.update(is_read=True)
+            for reader_is_a in (True, False):
+                group = [c for c in unread if (c.user_a_id == reader_id) == reader_is_a]
+                if not group:
+                    continue
+                unread_field = cls.unread_field(group[0].user_a_id, reader_id)
+                read_upto = cls.read_upto_field(group[0].user_a_id, reader_id)
+                marked = Case(
+                    *[When(pk=c.pk, then=Value(counts.get(c.last_message.sender_id, 0))) for c in group], default=0,
+                )
+                upto = Case(
+                    *[When(pk=c.pk, then=Value(c.last_message_id)) for c in group],
+                    default=F(read_upto),
+                    output_field=models.PositiveBigIntegerField(),
+                )
+                cls.objects.filter(pk__in=[c.pk for c in group]).update(**{
+                    unread_field: Greatest(F(unread_field) - marked, 0),
+                    read_upto: Greatest(F(read_upto), upto),
+                })
+        for c in unread:
+            c.last_message.is_read = True
+        return [(c.last_message, counts.get(c.last_message.sender_id, 0)) for c in unread]
+
+
+class ChatEvent(models.Model):
+    """
+    Outbox of realtime events for ``chat.realtime.DatabaseChannelLayer``:
+    every process polls it and pushes the rows addressed to its own sockets.
+    Rows are only kept for ``CHAT_CHANNEL_RETENTION`` seconds.
+    """
+    id = models.BigAutoField(primary_key=True)
+    user_id = models.IntegerField()
+    payload = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.payload.get('type')} for user {self.user_id}"
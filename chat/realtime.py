@@ -0,0 +1,163 @@
+import abc
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+
+class BaseChannelLayer(abc.ABC):
+    """
+    Delivers events to the WebSocket connections of a user. ``publish`` is
+    called from ordinary (sync) request code; ``subscribe``/``unsubscribe``
+    from the connection's event loop.
+    """
+
+    @abc.abstractmethod
+    def subscribe(self, user_id, loop, queue):
+        pass
+
+    @abc.abstractmethod
+    def unsubscribe(self, user_id, loop, queue):
+        pass
+
+    @abc.abstractmethod
+    def publish(self, user_id, event):
+        pass
+
+
+class InMemoryChannelLayer(BaseChannelLayer):
+    """
+    Single-process layer: events only reach sockets served by the same
+    process as the request that published them (one ASGI server handling
+    both HTTP and WebSocket traffic).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.groups = {}
+
+    def subscribe(self, user_id, loop, queue):
+        with self.lock:
+            self.groups.setdefault(user_id, set()).add((loop, queue))
+
+    def unsubscribe(self, user_id, loop, queue):
+        with self.lock:
+            members = self.groups.get(user_id)
+            if members:
+                members.discard((loop, queue))
+                if not members:
+                    del self.groups[user_id]
+
+    def publish(self, user_id, event):
+        with self.lock:
+            members = list(self.groups.get(user_id, ()))
+        for loop, queue in members:
+            loop.call_soon_threadsafe(offer, queue, event)
+
+
+class DatabaseChannelLayer(InMemoryChannelLayer):
+    """
+    Multi-process layer using the database as the shared broker: ``publish``
+    writes a ``ChatEvent`` row and a poller thread in every process that has
+    sockets reads new rows every ``CHAT_CHANNEL_POLL_INTERVAL`` seconds and
+    hands those addressed to its users to the local queues. Works with any
+    number of workers or hosts sharing the database, at the cost of up to one
+    poll interval of latency.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.poller = None
+        self.poller_lock = threading.Lock()
+
+    def subscribe(self, user_id, loop, queue):
+        super().subscribe(user_id, loop, queue)
+        with self.poller_lock:
+            if self.poller is None:
+                self.poller = threading.Thread(target=self.poll_forever, name="chat-events", daemon=True)
+                self.poller.start()
+
+    def publish(self, user_id, event):
+        from .models import ChatEvent
+        ChatEvent.objects.create(user_id=user_id, payload=event)
+
+    def poll_forever(self):
+        from .models import ChatEvent
+        # only events published from now on; older ones belong to closed sockets
+        last_id = ChatEvent.objects.order_by("-id").values_list("id", flat=True).first() or 0
+        polls = 0
+        while True:
+            try:
+                last_id = self.poll(last_id)
+                polls += 1
+                if polls % settings.CHAT_CHANNEL_PURGE_EVERY == 0:
+                    cutoff = timezone.now() - timedelta(seconds=settings.CHAT_CHANNEL_RETENTION)
+                    ChatEvent.objects.filter(created_at__lt=cutoff).delete()
+            except Exception:
+                logger.exception("Polling chat events failed")
+                close_old_connections()
+            time.sleep(settings.CHAT_CHANNEL_POLL_INTERVAL)
+
+    def poll(self, last_id):
+        """Deliver events newer than ``last_id`` to local sockets; returns the new position."""
+        from .models import ChatEvent
+        rows = ChatEvent.objects.filter(id__gt=last_id).order_by("id").values_list("id", "user_id", "payload")
+        for event_id, user_id, payload in rows[:settings.CHAT_CHANNEL_POLL_BATCH]:
+            InMemoryChannelLayer.publish(self, user_id, payload)
+            last_id = event_id
+        return last_id
+
+
+def offer(queue, event):
+    # A client that stops reading loses its oldest events rather than
+    # growing the queue without bound.
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(event)
+
+
+_layer = None
+_layer_lock = threading.Lock()
+
+
+def get_channel_layer():
+    global _layer
+    with _layer_lock:
+        if _layer is None:
+            _layer = import_string(settings.CHAT_CHANNEL_LAYER)()
+        return _layer
+
+
+def publish_on_commit(user_ids, event):
+    """Send ``event`` to every connection of ``user_ids`` once the transaction commits."""
+    def send():
+        layer = get_channel_layer()
+        for user_id in set(user_ids):
+            try:
+                layer.publish(user_id, event)
+            except Exception:
+                logger.exception("Could not publish %s to user %s", event.get("type"), user_id)
+
+    transaction.on_commit(send)
+
+
+def message_created(message, data):
+    publish_on_commit([message.sender_id, message.receiver_id], {"type": "chat.message", "message": data})
+
+
+def messages_read(reader_id, sender_id, count, read_upto=None):
+    if count:
+        publish_on_commit([reader_id, sender_id], {
+            "type": "chat.read",
+            "reader": reader_id,
+            "sender": sender_id,
+            "count": count,
+            "read_upto": read_upto,
+        })
@@ -0,0 +1,72 @@
+from django.db import connection
+from django.db.models import Q
+from lavender.search import MARK_START, MARK_STOP, fts5_match, tsquery_text
+from .models import ChatBubble
+
+SNIPPET_TOKENS = 12
+
+
+def _participant_sql(user_id, other_id):
+    if other_id is None:
+        return "(b.sender_id = %s OR b.receiver_id = %s)", [user_id, user_id]
+    return (
+        "((b.sender_id = %s AND b.receiver_id = %s) OR (b.sender_id = %s AND b.receiver_id = %s))",
+        [user_id, other_id, other_id, user_id],
+    )
+
+
+def search_messages(user_id, text, limit, before_id=None, other_id=None):
+    """
+    Messages of ``user_id`` (optionally only those exchanged with
+    ``other_id``) matching ``text``, newest first, as ``(id, snippet)`` pairs.
+    Uses the FTS5 table on SQLite and the GIN ``to_tsvector`` index on
+    PostgreSQL; other backends fall back to a LIKE scan.
+    """
+    participants, params = _participant_sql(user_id, other_id)
+    before = ""
+    if before_id is not None:
+        before = "AND b.id < %s"
+        params.append(before_id)
+
+    if connection.vendor == "sqlite":
+        match = fts5_match(text)
+        if match is None:
+            return []
+        sql = f"""
+            SELECT b.id, snippet(chat_message_fts, 0, %s, %s, '…', {SNIPPET_TOKENS})
+            FROM chat_message_fts f
+            JOIN chat_chatbubble b ON b.id = f.rowid
+            WHERE chat_message_fts MATCH %s AND {participants} {before}
+            ORDER BY b.id DESC
+            LIMIT %s
+        """
+        params = [MARK_START, MARK_STOP, match, *params, limit]
+    elif connection.vendor == "postgresql":
+        words = tsquery_text(text)
+        if not words:
+            return []
+        sql = f"""
+            SELECT b.id, ts_headline('simple', b.message, plainto_tsquery('simple', %s), %s)
+            FROM chat_chatbubble b
+            WHERE to_tsvector('simple', coalesce(b.message, '')) @@ plainto_tsquery('simple', %s)
+              AND {participants} {before}
+            ORDER BY b.id DESC
+            LIMIT %s
+        """
+        options = f"StartSel={MARK_START}, StopSel={MARK_STOP}, MaxWords={SNIPPET_TOKENS * 2}, MinWords={SNIPPET_TOKENS // 2}"
+        params = [words, options, words, *params, limit]
+    else:
+        queryset = ChatBubble.objects.filter(message__icontains=text.strip())
+        if other_id is None:
+            queryset = queryset.filter(Q(sender_id=user_id) | Q(receiver_id=user_id))
+        else:
+            queryset = queryset.filter(
+                Q(sender_id=user_id, receiver_id=other_id) | Q(sender_id=other_id, receiver_id=user_id)
+            )
+        if before_id is not None:
+            queryset = queryset.filter(id__lt=before_id)
+        return list(queryset.order_by("-id").values_list("id", "message")[:limit])
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
@@ -28,6 +28,34 @@ class MessageSerializer(serializers.ModelSerializer):
         return serializer.data
     
 
+class CompactMessageSerializer(serializers.ModelSerializer):
+    """Message with bare user ids; the users go in a separate ``participants`` map."""
+
+    class Meta:
+        model = ChatBubble
+        fields = ('id', 'sender', 'receiver', 'message', 'is_read', 'timestamp')
+
+
+def serialize_compact(messages, context=None):
+    """
+    Serialize ``messages`` with each distinct sender/receiver written once:
+    returns ``(messages_data, participants)`` where participants maps user id
+    to ``UserSerializer`` output. Expects sender and receiver to be loaded.
+    """
+    users = {}
+    for message in messages:
+        users.setdefault(message.sender_id, message.sender)
+        users.setdefault(message.receiver_id, message.receiver)
+    participants = {
+        str(user_id): UserSerializer(user, context=context).data for user_id, user in users.items()
+    }
+    return CompactMessageSerializer(messages, many=True, context=context).data, participants
+
+
+def wants_compact(request):
+    return request.query_params.get('compact') in ('1', 'true', 'True')
+
+
 class ReadReceiptSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)  
     read_at = serializers.DateTimeField(read_only=True)
@@ -1,3 +1,121 @@
-from django.test import TestCase
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from .models import ChatBubble, Conversation, ReadReceipt
+
+
+def send(sender, receiver, text="hi"):
+    message = ChatBubble.objects.create(sender=sender, receiver=receiver, message=text)
+    Conversation.record_message(message)
+    return message
+
+
+def unread(reader, other):
+    conversation = Conversation.between(reader.id, other.id)
+    return getattr(conversation, Conversation.unread_field(conversation.user_a_id, reader.id))
+
+
+class InboxTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_opening_someone_elses_inbox_is_forbidden(self):
+        message = send(self.alice, self.bob)
+
+        response = self.client.get(f"/api/v1/messages/myMessages/{self.bob.id}")
+
+        self.assertEqual(response.status_code, 403)
+        message.refresh_from_db()
+        self.assertFalse(message.is_read)
+        self.assertEqual(Conversation.between(self.alice.id, self.bob.id).read_upto(self.bob.id), 0)
+        self.assertEqual(unread(self.bob, self.alice), 1)
+
+    def test_opening_the_inbox_marks_previewed_messages_read(self):
+        send(self.bob, self.alice)
+        last = send(self.bob, self.alice)
+
+        response = self.client.get(f"/api/v1/messages/myMessages/{self.alice.id}")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([m["id"] for m in response.json()["data"]], [last.id])
+        self.assertFalse(ChatBubble.objects.filter(receiver=self.alice, is_read=False).exists())
+        conversation = Conversation.between(self.alice.id, self.bob.id)
+        self.assertEqual(conversation.read_upto(self.alice.id), last.id)
+
+
+class MarkReadTests(TestCase):
+    def setUp(self):
+        self.alice = User.objects.create_user(username="alice", email="alice@example.com")
+        self.bob = User.objects.create_user(username="bob", email="bob@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.alice)
+
+    def test_mark_read_counts_and_moves_the_watermark(self):
+        send(self.alice, self.bob)
+        send(self.bob, self.alice)
+        last = send(self.bob, self.alice)
+
+        self.assertEqual(unread(self.alice, self.bob), 2)
+        self.assertEqual(Conversation.mark_read(self.alice.id, self.bob.id), (2, last.id))
+        self.assertEqual(unread(self.alice, self.bob), 0)
+        self.assertEqual(unread(self.bob, self.alice), 1)
+        self.assertEqual(Conversation.mark_read(self.alice.id, self.bob.id), (0, None))
+
+    @override_settings(CHAT_PER_MESSAGE_RECEIPTS=True)
+    def test_message_arriving_during_mark_read_stays_unread(self):
+        first = send(self.bob, self.alice)
+        second = send(self.bob, self.alice)
+        bulk_create = ReadReceipt.objects.bulk_create
+        arrivals = []
+
+        def bulk_create_then_receive(*args, **kwargs):
+            # bob sends another message after the unread ids were read
+            arrivals.append(send(self.bob, self.alice))
+            return bulk_create(*args, **kwargs)
+
+        with mock.patch.object(ReadReceipt.objects, "bulk_create", side_effect=bulk_create_then_receive):
+            count, read_upto = Conversation.mark_read(self.alice.id, self.bob.id)
+
+        self.assertEqual((count, read_upto), (2, second.id))
+        self.assertEqual(unread(self.alice, self.bob), 1)
+        self.assertEqual(Conversation.between(self.alice.id, self.bob.id).read_upto(self.alice.id), second.id)
+        self.assertFalse(ChatBubble.objects.get(pk=arrivals[0].pk).is_read)
+        self.assertEqual(set(ReadReceipt.objects.values_list("message_id", flat=True)), {first.id, second.id})
+
+    def test_unread_count_never_goes_negative(self):
+        send(self.bob, self.alice)
+        send(self.bob, self.alice)
+        Conversation.objects.update(unread_a=1, unread_b=1)
+
+        Conversation.mark_read(self.alice.id, self.bob.id)
+
+        self.assertEqual(unread(self.alice, self.bob), 0)
+
+    def test_messages_after_the_inbox_preview_stay_unread(self):
+        send(self.bob, self.alice)
+        send(self.bob, self.alice)
+        self.client.get(f"/api/v1/messages/myMessages/{self.alice.id}")
+        later = send(self.bob, self.alice)
+
+        response = self.client.get("/api/v1/messages/unread-count/")
+
+        self.assertEqual(response.json()["total"], 1)
+        self.assertEqual(unread(self.alice, self.bob), 1)
+        self.assertEqual(Conversation.mark_read(self.alice.id, self.bob.id), (1, later.id))
+        self.assertEqual(self.client.get("/api/v1/messages/unread-count/").json()["total"], 0)
+
+    def test_inbox_leaves_conversations_whose_last_message_is_outgoing(self):
+        incoming = send(self.bob, self.alice)
+        send(self.alice, self.bob)
+
+        self.client.get(f"/api/v1/messages/myMessages/{self.alice.id}")
+
+        incoming.refresh_from_db()
+        self.assertFalse(incoming.is_read)
+        self.assertEqual(unread(self.alice, self.bob), 1)
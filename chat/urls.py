@@ -3,6 +3,9 @@ from . import views
 
 urlpatterns = [
     path('messages/myMessages/<int:user_id>',views.MyInbox.as_view() ,name= "create-chat"),
+    path('messages/unread-count/', views.UnreadCount.as_view(), name='unread-count'),
+    path('messages/search/', views.SearchMessages.as_view(), name='search-messages'),
+    path('messages/<int:message_id>/receipts/', views.MessageReceipts.as_view(), name='message-receipts'),
     path('messages/<int:sender_id>/<int:receiver_id>/', views.getMessages.as_view(), name='get-messages'),
     path('sendMessages/',views.sendMessage.as_view() ,name= "send-messages"),
     path('mark-read/<int:sender_id>/', views.MarkMessagesRead.as_view(), name='mark-read'),
@@ -1,7 +1,13 @@
 from .serializers import *
 from .models import *
+from .realtime import message_created, messages_read
+from .search import search_messages
+from lavender.pagination import InvalidCursor, decode_cursor, encode_cursor, get_page_size, paginate_keyset
+from lavender.search import mark_snippet
 from rest_framework.response import Response
-from django.db.models import Subquery, OuterRef, Q
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
 from rest_framework import generics,status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.views import APIView
@@ -11,44 +17,40 @@ class MyInbox(generics.ListCreateAPIView):
     serializer_class = MessageSerializer
 
     def get_queryset(self):
-        user_id = self.kwargs['user_id']
-
-        # 1. Subquery to find the latest message ID for each conversation
-        last_msg_subquery = ChatBubble.objects.filter(
-            Q(sender=OuterRef('id'), receiver=user_id) | 
-            Q(receiver=OuterRef('id'), sender=user_id)
-        ).order_by('-id')[:1] 
-
-        # 2. Get the actual message objects
-        messages = ChatBubble.objects.filter(
-            id__in=Subquery(
-                User.objects.filter(
-                    Q(sender__receiver=user_id) |
-                    Q(receiver__sender=user_id)
-                ).distinct().annotate(
-                    last_msg=Subquery(last_msg_subquery.values('id')) 
-                ).values('last_msg') 
-            )
-        ).order_by('-id')
-
-        # 3. Mark received messages as read
-        # Note: Be careful with .save() inside get_queryset as it triggers 
-        # database writes during a GET request.
-        for message in messages:
-            if message.receiver.id == int(user_id):
-                message.is_read = True 
-                message.save() 
-
-        return messages
+        return Conversation.for_user(self.request.user.id).select_related(
+            'last_message__sender', 'last_message__receiver'
+        )
 
     # OVERRIDE the list method to change response structure
     def list(self, request, *args, **kwargs):
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
+        # opening an inbox marks messages read, so only its owner may do it
+        if self.kwargs['user_id'] != request.user.id:
+            return Response({"error": "You can only open your own inbox."}, status=status.HTTP_403_FORBIDDEN)
+        conversations = list(self.get_queryset())
+        # Opening the inbox marks the previewed messages as read
+        for message, count in Conversation.mark_last_messages_read(request.user.id, conversations):
+            messages_read(message.receiver_id, message.sender_id, count, read_upto=message.id)
+        messages = [c.last_message for c in conversations if c.last_message]
+        if wants_compact(request):
+            data, participants = serialize_compact(messages, self.get_serializer_context())
+            return Response({"data": data, "participants": participants}, status=status.HTTP_200_OK)
+        serializer = self.get_serializer(messages, many=True)
         return Response({"data": serializer.data}, status=status.HTTP_200_OK)
 
         
 class getMessages(generics.ListAPIView):
+    """
+    Message history between two users, one page at a time:
+
+    * no parameters or ``?before=<cursor>``: the newest messages (or those
+      older than the cursor), returned oldest first;
+    * ``?after=<cursor>``: messages newer than the cursor;
+    * ``?since_id=<id>``: incremental sync of everything after a message id.
+
+    ``page_size`` is capped at ``CHAT_MESSAGES_MAX_PAGE_SIZE``. With
+    ``?compact=1`` messages carry bare user ids and each user is serialized
+    once under ``participants``.
+    """
     permission_classes = [IsAuthenticated]
     serializer_class = MessageSerializer
 
@@ -58,22 +60,45 @@ class getMessages(generics.ListAPIView):
         return ChatBubble.objects.filter(
             Q(sender_id=sender_id, receiver_id=receiver_id) |
             Q(sender_id=receiver_id, receiver_id=sender_id)
-        ).order_by('timestamp')
+        ).select_related('sender', 'receiver')
 
     def list(self, request, *args, **kwargs):
         sender_id = self.kwargs['sender_id']
         receiver_id = self.kwargs['receiver_id']
+        if request.user.id not in (sender_id, receiver_id):
+            return Response({"error": "You are not part of this conversation."}, status=status.HTTP_403_FORBIDDEN)
+        other_id = receiver_id if request.user.id == sender_id else sender_id
+
+        params = request.query_params
+        page_size = get_page_size(request, settings.CHAT_MESSAGES_PAGE_SIZE, settings.CHAT_MESSAGES_MAX_PAGE_SIZE)
+        queryset = self.get_queryset()
+        before_cursor = after_cursor = None
+        try:
+            if params.get("since_id"):
+                messages = list(queryset.filter(id__gt=int(params["since_id"])).order_by("id")[:page_size + 1])
+                has_more = len(messages) > page_size
+                messages = messages[:page_size]
+            elif params.get("after"):
+                messages, after_cursor = paginate_keyset(queryset, ["timestamp", "id"], params["after"], page_size, descending=False)
+                has_more = after_cursor is not None
+            else:
+                messages, before_cursor = paginate_keyset(queryset, ["timestamp", "id"], params.get("before"), page_size)
+                has_more = before_cursor is not None
+                messages.reverse()
+        except (InvalidCursor, ValueError):
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
 
         # Logic: If I am receiving these messages, mark them as read
-        ChatBubble.objects.filter(
-            sender_id=sender_id, 
-            receiver_id=receiver_id, 
-            is_read=False
-        ).update(is_read=True)
+        count, read_upto = Conversation.mark_read(request.user.id, other_id)
+        messages_read(request.user.id, other_id, count, read_upto)
 
-        queryset = self.get_queryset()
-        serializer = self.get_serializer(queryset, many=True)
-        return Response({"messages": serializer.data})
+        if wants_compact(request):
+            data, participants = serialize_compact(messages, self.get_serializer_context())
+            page = {"messages": data, "participants": participants}
+        else:
+            page = {"messages": self.get_serializer(messages, many=True).data}
+        page.update(has_more=has_more, before_cursor=before_cursor, after_cursor=after_cursor)
+        return Response(page)
 
 
 class sendMessage(generics.ListCreateAPIView):
@@ -81,7 +106,10 @@ class sendMessage(generics.ListCreateAPIView):
     serializer_class = MessageSerializer
     
     def perform_create(self, serializer):
-        serializer.save(sender = self.request.user)
+        with transaction.atomic():
+            message = serializer.save(sender = self.request.user)
+            Conversation.record_message(message)
+            message_created(message, serializer.data)
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data = request.data)
@@ -97,16 +125,89 @@ class MarkMessagesRead(APIView):
 
     def post(self, request, sender_id):
         # We want to mark messages sent BY sender_id TO the current user
-        unread_messages = ChatBubble.objects.filter(
-            sender_id=sender_id, 
-            receiver=request.user, 
-            is_read=False
-        )
-        
-        # .update() is much faster than a for-loop with .save()
-        count = unread_messages.update(is_read=True)
+        count, read_upto = Conversation.mark_read(request.user.id, sender_id)
+        messages_read(request.user.id, sender_id, count, read_upto)
         
         return Response(
             {"message": f"{count} messages marked as read."}, 
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+
+
+class UnreadCount(APIView):
+    """Unread badge data: per-conversation counts and the total, from one query."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        conversations = Conversation.unread_for_user(request.user.id).values('id', 'other_id', 'unread')
+        data = [
+            {"conversation": c['id'], "user": c['other_id'], "unread": c['unread']}
+            for c in conversations
+        ]
+        return Response(
+            {"total": sum(c["unread"] for c in data), "conversations": data},
+            status=status.HTTP_200_OK
+        )
+
+
+class MessageReceipts(APIView):
+    """
+    Read state of one message, loaded on demand instead of with every
+    message: read if it is at or below the receiver's watermark, with the
+    exact time when a per-message receipt was recorded.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, message_id):
+        message = ChatBubble.objects.filter(id=message_id).first()
+        if message is None or request.user.id not in (message.sender_id, message.receiver_id):
+            return Response({"error": "Message not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        conversation = Conversation.between(message.sender_id, message.receiver_id)
+        read_upto = conversation.read_upto(message.receiver_id) if conversation else 0
+        receipts = ReadReceiptSerializer(message.receipts.all(), many=True).data
+        return Response({
+            "message": message.id,
+            "read": message.is_read or message.id <= read_upto,
+            "read_upto": read_upto,
+            "receipts": receipts,
+        }, status=status.HTTP_200_OK)
+
+
+class SearchMessages(APIView):
+    """
+    Full-text search over the requesting user's own messages, newest first,
+    with highlighted snippets. ``?with=<user_id>`` limits it to one
+    conversation; ``?cursor=`` continues from the previous page.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            return Response({"error": "Query parameter q is required."}, status=status.HTTP_400_BAD_REQUEST)
+        page_size = get_page_size(request, settings.CHAT_SEARCH_PAGE_SIZE, settings.CHAT_SEARCH_MAX_PAGE_SIZE)
+        try:
+            cursor = decode_cursor(request.query_params.get("cursor"), 1)
+            other_id = int(request.query_params["with"]) if request.query_params.get("with") else None
+            before_id = int(cursor[0]) if cursor else None
+        except (InvalidCursor, TypeError, ValueError):
+            return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+        hits = search_messages(request.user.id, text, page_size + 1, before_id=before_id, other_id=other_id)
+        next_cursor = None
+        if len(hits) > page_size:
+            hits = hits[:page_size]
+            next_cursor = encode_cursor([hits[-1][0]])
+
+        messages = ChatBubble.objects.select_related('sender', 'receiver').in_bulk([message_id for message_id, _ in hits])
+        data, participants = serialize_compact(
+            [messages[message_id] for message_id, _ in hits], {"request": request}
+        )
+        for item, (_, snippet) in zip(data, hits):
+            item["snippet"] = mark_snippet(snippet)
+        return Response({
+            "results": data,
+            "participants": participants,
+            "next_cursor": next_cursor,
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1,52 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from lavender.images import delete_renditions
+from .models import Status
+
+logger = logging.getLogger(__name__)
+
+
+def purge_expired_statuses(chunk_size=None, pause=None, now=None):
+    """
+    Delete expired statuses ``chunk_size`` at a time, each chunk in its own
+    short transaction (cascading to replies, likes and seen marks), and
+    remove their image files and renditions once the chunk is committed.
+    Sleeps ``pause`` seconds between chunks so other writers get the
+    database. Returns the number of statuses deleted.
+    """
+    chunk_size = chunk_size or settings.COMMUNITY_STATUS_EXPIRY_CHUNK_SIZE
+    pause = settings.COMMUNITY_STATUS_EXPIRY_SLEEP if pause is None else pause
+    now = now or timezone.now()
+
+    deleted = 0
+    while True:
+        batch = list(
+            Status.objects.filter(expires_at__lte=now)
+            .order_by("expires_at")
+            .values_list("id", "image", "image_renditions")[:chunk_size]
+        )
+        if not batch:
+            break
+
+        with transaction.atomic():
+            Status.objects.filter(id__in=[pk for pk, _, _ in batch]).delete()
+
+        for _, image, renditions in batch:
+            if image:
+                try:
+                    default_storage.delete(image)
+                except OSError:
+                    logger.warning("Could not delete expired status image %s", image, exc_info=True)
+            delete_renditions(renditions)
+
+        deleted += len(batch)
+        if len(batch) < chunk_size:
+            break
+        time.sleep(pause)
+    return deleted
@@ -0,0 +1,104 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from community.models import Comment, Posts, Reply, Status, TimelineEntry
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Print query plans and timings for the community feed, comment and status read paths. "
+        "Seeds synthetic rows inside a transaction that is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=200)
+        parser.add_argument("--posts", type=int, default=5000)
+        parser.add_argument("--comments-per-post", type=int, default=5)
+        parser.add_argument("--repeat", type=int, default=20, help="Executions per query when timing.")
+        parser.add_argument("--no-seed", action="store_true", help="Benchmark the existing data instead.")
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                if not options["no_seed"]:
+                    self.seed(options)
+                self.report(options["repeat"])
+                raise Rollback
+        except Rollback:
+            pass
+
+    def seed(self, options):
+        now = timezone.now()
+        tag = uuid.uuid4().hex[:8]
+        users = User.objects.bulk_create(
+            [User(username=f"bench-{tag}-{i}", email=f"bench-{tag}-{i}@example.com") for i in range(options["users"])]
+        )
+        users = list(User.objects.filter(username__startswith=f"bench-{tag}-"))
+
+        posts = Posts.objects.bulk_create([
+            Posts(user=users[i % len(users)], caption="bench", fanout_on_read=i % 10 == 0)
+            for i in range(options["posts"])
+        ])
+        for i, post in enumerate(posts):
+            post.created_at = now - timedelta(minutes=i)
+        Posts.objects.bulk_update(posts, ["created_at"], batch_size=500)
+
+        reader = users[0]
+        TimelineEntry.objects.bulk_create(
+            [TimelineEntry(user=reader, post=post, created_at=post.created_at) for post in posts if not post.fanout_on_read],
+            batch_size=500,
+        )
+        comments = Comment.objects.bulk_create(
+            [Comment(post=post, user=reader, content="bench") for post in posts for _ in range(options["comments_per_post"])],
+            batch_size=500,
+        )
+        Reply.objects.bulk_create(
+            [Reply(comment=comment, user=reader, content="bench") for comment in comments[::10]],
+            batch_size=500,
+        )
+        statuses = Status.objects.bulk_create([Status(user=user, caption="bench") for user in users for _ in range(3)])
+        expired = [status for i, status in enumerate(statuses) if i % 2]
+        for status_obj in expired:
+            status_obj.expires_at = now - timedelta(hours=1)
+        Status.objects.bulk_update(expired, ["expires_at"], batch_size=500)
+
+        self.stdout.write(
+            f"Seeded {len(users)} users, {len(posts)} posts, {len(comments)} comments, {len(statuses)} statuses."
+        )
+
+    def report(self, repeat):
+        reader = TimelineEntry.objects.values_list("user_id", flat=True).first() or User.objects.values_list("id", flat=True).first()
+        post = Posts.objects.order_by("-comments_count", "-created_at").first() or Posts.objects.first()
+        comment = Comment.objects.filter(post=post).first()
+
+        queries = {
+            "home timeline page": TimelineEntry.objects.filter(user_id=reader).order_by("-created_at", "-post_id")[:21],
+            "fan-out-on-read posts": Posts.objects.filter(fanout_on_read=True).order_by("-created_at", "-id")[:21],
+            "posts of one user": Posts.objects.filter(user_id=reader).order_by("-created_at")[:20],
+            "comment list": Comment.objects.filter(post=post).order_by("-created_at"),
+            "reply list": Reply.objects.filter(comment=comment).order_by("created_at"),
+            "active statuses": Status.active.order_by("-created_at"),
+            "active statuses of one user": Status.active.filter(user_id=reader).order_by("-created_at"),
+        }
+
+        for name, queryset in queries.items():
+            plan = queryset.explain()
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            elapsed = (time.perf_counter() - started) / repeat * 1000
+
+            uses_index = any(marker in plan for marker in ("USING INDEX", "USING COVERING INDEX", "Index Scan", "Index Only Scan"))
+            style = self.style.SUCCESS if uses_index else self.style.WARNING
+            self.stdout.write(style(f"{name}: {elapsed:.2f} ms"))
+            for line in plan.splitlines():
+                self.stdout.write(f"    {line}")
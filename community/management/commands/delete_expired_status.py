@@ -0,0 +1,25 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from community.expiry import purge_expired_statuses
+
+
+class Command(BaseCommand):
+    help = "Delete expired statuses (and their images) in bounded chunks"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=settings.COMMUNITY_STATUS_EXPIRY_CHUNK_SIZE)
+        parser.add_argument("--sleep", type=float, default=settings.COMMUNITY_STATUS_EXPIRY_SLEEP,
+                            help="Seconds to pause between chunks.")
+        parser.add_argument("--loop", action="store_true", help="Keep running instead of exiting after one pass.")
+        parser.add_argument("--interval", type=int, default=settings.COMMUNITY_STATUS_EXPIRY_INTERVAL,
+                            help="Seconds between passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            count = purge_expired_statuses(chunk_size=options["chunk_size"], pause=options["sleep"])
+            self.stdout.write(self.style.SUCCESS(f"Deleted {count} expired statuses."))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
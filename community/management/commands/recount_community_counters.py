@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import F
+from community.models import (
+    Posts, Comment, Reply, Status, LikeComments, LikeReplies, StatusReply, count_subquery
+)
+
+# (model, counter column, rows being counted, foreign key on those rows)
+COUNTERS = [
+    (Posts, "likes_count", Posts.likes.through.objects, "posts_id"),
+    (Posts, "comments_count", Comment.objects, "post_id"),
+    (Comment, "likes_count", LikeComments.objects, "comment_id"),
+    (Comment, "replies_count", Reply.objects, "comment_id"),
+    (Reply, "likes_count", LikeReplies.objects, "reply_id"),
+    (Status, "likes_count", Status.likes.through.objects, "status_id"),
+    (Status, "replies_count", StatusReply.objects, "status_id"),
+]
+
+
+class Command(BaseCommand):
+    help = "Recompute denormalized like/comment/reply counters and repair any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drifted rows.")
+
+    def handle(self, *args, **options):
+        for model, field, rows, fk in COUNTERS:
+            actual = count_subquery(rows, fk)
+            drifted = model.objects.annotate(actual=actual).exclude(**{field: F("actual")})
+            count = drifted.count()
+
+            if count and not options["dry_run"]:
+                with transaction.atomic():
+                    model.objects.filter(pk__in=drifted.values("pk")).update(**{field: actual})
+
+            label = f"{model.__name__}.{field}"
+            if count:
+                verb = "Found" if options["dry_run"] else "Repaired"
+                self.stdout.write(self.style.WARNING(f"{verb} {count} drifted rows in {label}."))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"{label} is in sync."))
@@ -0,0 +1,76 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:17
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_counters(apps, schema_editor):
+    Posts = apps.get_model('community', 'Posts')
+    Comment = apps.get_model('community', 'Comment')
+    Reply = apps.get_model('community', 'Reply')
+    Status = apps.get_model('community', 'Status')
+
+    def counted(model, fk):
+        rows = model.objects.filter(**{fk: OuterRef('pk')}).values(fk).annotate(total=Count('*')).values('total')
+        return Coalesce(Subquery(rows), 0)
+
+    Posts.objects.update(
+        likes_count=counted(Posts.likes.through, 'posts_id'),
+        comments_count=counted(Comment, 'post_id'),
+    )
+    Comment.objects.update(
+        likes_count=counted(apps.get_model('community', 'LikeComments'), 'comment_id'),
+        replies_count=counted(Reply, 'comment_id'),
+    )
+    Reply.objects.update(likes_count=counted(apps.get_model('community', 'LikeReplies'), 'reply_id'))
+    Status.objects.update(
+        likes_count=counted(Status.likes.through, 'status_id'),
+        replies_count=counted(apps.get_model('community', 'StatusReply'), 'status_id'),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0003_remove_likecomments_liked'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='posts',
+            name='comments_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='posts',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='reply',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='status',
+            name='likes_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='status',
+            name='replies_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
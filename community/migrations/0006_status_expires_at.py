@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:21
+
+import community.models
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def backfill_expires_at(apps, schema_editor):
+    Status = apps.get_model('community', 'Status')
+    Status.objects.update(expires_at=F('created_at') + timedelta(hours=24))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0005_post_timeline'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='status',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=community.models.status_expiry),
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+    ]
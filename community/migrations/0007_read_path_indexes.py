@@ -0,0 +1,31 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0006_status_expires_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['post', 'created_at'], name='community_comment_post_created'),
+        ),
+        migrations.AddIndex(
+            model_name='posts',
+            index=models.Index(fields=['user', 'created_at'], name='community_posts_user_created'),
+        ),
+        migrations.AddIndex(
+            model_name='reply',
+            index=models.Index(fields=['comment', 'created_at'], name='community_reply_cmt_created'),
+        ),
+        migrations.AddIndex(
+            model_name='status',
+            index=models.Index(fields=['user', 'created_at'], name='community_status_user_created'),
+        ),
+    ]
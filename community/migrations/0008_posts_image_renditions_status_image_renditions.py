@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:23
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('community', '0007_read_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='posts',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='status',
+            name='image_renditions',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+    ]
@@ -1,9 +1,46 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Subquery
+from django.db.models.functions import Coalesce, Now
+from django.contrib.auth.signals import user_logged_in
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.conf import settings
 import uuid
 from django.core.exceptions import ValidationError
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
+from lavender import background
+
+
+def count_subquery(queryset, field):
+    """Correlated COUNT(*) of ``queryset`` rows pointing at the outer row through ``field``."""
+    counts = queryset.filter(**{field: OuterRef("pk")}).values(field).annotate(total=Count("*")).values("total")
+    return Coalesce(Subquery(counts), 0)
+
+
+def adjust_counter(model, pk, field, delta):
+    """Atomically move a denormalized counter column by ``delta``."""
+    model.objects.filter(pk=pk).update(**{field: F(field) + delta})
+
+
+def toggle_like(obj, likes, **lookup):
+    """
+    Remove the like row matching ``lookup`` from ``likes`` or create it, and
+    move ``obj.likes_count`` by the same amount. Returns whether ``obj`` is
+    liked afterwards.
+    """
+    with transaction.atomic():
+        removed, _ = likes.filter(**lookup).delete()
+        if removed:
+            liked, delta = False, -removed
+        else:
+            _, created = likes.get_or_create(**lookup)
+            liked, delta = True, int(created)
+        if delta:
+            adjust_counter(type(obj), obj.pk, "likes_count", delta)
+    obj.refresh_from_db(fields=["likes_count"])
+    return liked
 
 
 class Posts(models.Model):
@@ -13,18 +50,132 @@ class Posts(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     likes = models.ManyToManyField(User, related_name="liked_posts", blank=True)
     image = models.ImageField(upload_to="posts_pics", blank=True, null=True, default=None)
+    # WebP renditions keyed by size, see lavender.images
+    image_renditions = models.JSONField(default=dict, blank=True)
     video = models.FileField(upload_to="posts_videos", blank=True, null=True, default=None)
+    likes_count = models.PositiveIntegerField(default=0)
+    comments_count = models.PositiveIntegerField(default=0)
+    # set when the audience was too large to push the post into every
+    # timeline; such posts are merged into feeds at read time instead
+    fanout_on_read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["-created_at", "-id"],
+                condition=models.Q(fanout_on_read=True),
+                name="community_posts_pull_idx",
+            ),
+            models.Index(fields=["user", "created_at"], name="community_posts_user_created"),
+        ]
 
     def like_post(self, user):
-        if user in self.likes.all():
-            self.likes.remove(user)
-        else:
-            self.likes.add(user)
+        return toggle_like(self, Posts.likes.through.objects, posts_id=self.pk, user_id=user.pk)
+
+    @classmethod
+    def feed_queryset(cls, user, comments_preview=3):
+        """
+        Posts annotated with everything ``PostSerializer`` needs so a page costs
+        two queries: the posts themselves and the newest ``comments_preview``
+        comments of every post on the page.
+        """
+        post_likes = cls.likes.through.objects
+        comments = Comment.viewer_queryset(user).order_by("-created_at", "-id")[:comments_preview]
+        return cls.objects.annotate(
+            viewer_liked=Exists(post_likes.filter(posts_id=OuterRef("pk"), user_id=user.id)),
+        ).prefetch_related(Prefetch("comments", queryset=comments, to_attr="preview_comments"))
 
     def __str__(self):
         return f"Post by {self.user.username}"
 
 
+class TimelineEntry(models.Model):
+    """
+    Materialized home timeline: one row per (reader, post), written when the
+    post is created so reading a feed is a range scan on (user, created_at).
+    """
+    user = models.ForeignKey(User, related_name="timeline", on_delete=models.CASCADE)
+    post = models.ForeignKey(Posts, related_name="timeline_entries", on_delete=models.CASCADE)
+    # copied from the post so the feed never has to join to order
+    created_at = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['user', 'post']
+        indexes = [
+            models.Index(fields=["user", "-created_at", "-post"], name="community_timeline_feed_idx"),
+        ]
+
+    @classmethod
+    def audience(cls, author):
+        """
+        Members active within ``COMMUNITY_FANOUT_ACTIVE_DAYS``, most recent
+        first. There is no follow graph yet, so this is who reads the feed;
+        members coming back later catch up through ``seed_for_user`` at login.
+        """
+        since = timezone.now() - timedelta(days=settings.COMMUNITY_FANOUT_ACTIVE_DAYS)
+        return User.objects.filter(is_active=True, last_login__gte=since).order_by("-last_login")
+
+    @classmethod
+    def publish(cls, post):
+        """
+        Put ``post`` in its author's timeline right away and fan it out to
+        everyone else on the background pool once the transaction commits.
+        """
+        cls.objects.bulk_create([cls(user_id=post.user_id, post=post, created_at=post.created_at)], ignore_conflicts=True)
+        background.submit(cls.fan_out, post)
+
+    @classmethod
+    def fan_out(cls, post):
+        """
+        Push ``post`` into the timeline of every member of its audience. When
+        the audience is larger than ``COMMUNITY_FANOUT_CAP`` the post is flagged
+        ``fanout_on_read`` and left for the read path instead.
+        """
+        cap = settings.COMMUNITY_FANOUT_CAP
+        user_ids = list(cls.audience(post.user).values_list("id", flat=True)[:cap + 1])
+        if len(user_ids) > cap:
+            Posts.objects.filter(pk=post.pk).update(fanout_on_read=True)
+            post.fanout_on_read = True
+            return 0
+
+        if post.user_id not in user_ids:
+            user_ids.append(post.user_id)
+        cls.objects.bulk_create(
+            [cls(user_id=user_id, post=post, created_at=post.created_at) for user_id in user_ids],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+        return len(user_ids)
+
+    @classmethod
+    def seed_for_user(cls, user):
+        """Give a new member the most recent pushed posts so their feed is not empty."""
+        posts = Posts.objects.filter(fanout_on_read=False).order_by("-created_at", "-id")
+        posts = posts.values_list("id", "created_at")[:settings.COMMUNITY_TIMELINE_SEED]
+        cls.objects.bulk_create(
+            [cls(user=user, post_id=post_id, created_at=created_at) for post_id, created_at in posts],
+            batch_size=500,
+            ignore_conflicts=True,
+        )
+
+
+@receiver(post_save, sender=User)
+def seed_timeline(sender, instance, created, **kwargs):
+    if created:
+        TimelineEntry.seed_for_user(instance)
+
+
+@receiver(user_logged_in)
+def catch_up_timeline(sender, user, **kwargs):
+    # Members outside the fan-out audience missed posts pushed meanwhile;
+    # those inside it already got them. Connected at model import, before
+    # auth's ready() hooks up update_last_login, so last_login is still the
+    # previous login here.
+    since = timezone.now() - timedelta(days=settings.COMMUNITY_FANOUT_ACTIVE_DAYS)
+    if user.last_login is None or user.last_login < since:
+        background.submit(TimelineEntry.seed_for_user, user)
+
+
 class UserSeenPosts(models.Model):
     user = models.ForeignKey(User, related_name='seen_posts', on_delete=models.CASCADE)
     post = models.ForeignKey(Posts, related_name='seen_by', on_delete=models.CASCADE)
@@ -33,6 +184,11 @@ class UserSeenPosts(models.Model):
     class Meta:
         unique_together = ['user', 'post']
 
+    @classmethod
+    def bulk_mark_seen(cls, pairs):
+        """Record (user_id, post_id) pairs in one INSERT, skipping those already seen."""
+        cls.objects.bulk_create([cls(user_id=user_id, post_id=post_id) for user_id, post_id in pairs], ignore_conflicts=True)
+
 class Comment(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     post = models.ForeignKey(Posts, related_name="comments", on_delete=models.CASCADE)
@@ -40,14 +196,26 @@ class Comment(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     edited = models.BooleanField(default=False)
-    
-    @property
-    def likes_count(self):
-        return self.comment_likes.count()
+    likes_count = models.PositiveIntegerField(default=0)
+    replies_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["post", "created_at"], name="community_comment_post_created"),
+        ]
 
     def is_liked_by(self, user):
         return self.comment_likes.filter(user=user).exists()
 
+    def like_comment(self, user):
+        return toggle_like(self, LikeComments.objects, comment_id=self.pk, user_id=user.pk)
+
+    @classmethod
+    def viewer_queryset(cls, user):
+        return cls.objects.annotate(
+            viewer_liked=Exists(LikeComments.objects.filter(comment_id=OuterRef("pk"), user_id=user.id)),
+        )
+
     def __str__(self):
         return f"Comment by {self.user.username} on {self.post}"
     
@@ -70,6 +238,15 @@ class Reply(models.Model):
     content = models.TextField()
     created_at = models.DateTimeField(auto_now_add=True)
     edited = models.BooleanField(default=False)
+    likes_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["comment", "created_at"], name="community_reply_cmt_created"),
+        ]
+
+    def like_reply(self, user):
+        return toggle_like(self, LikeReplies.objects, reply_id=self.pk, user_id=user.pk)
 
     def __str__(self):
         return f"Reply by {self.user.username} on {self.comment}"
@@ -108,23 +285,53 @@ class Likes(models.Model):
 
 
 
+def status_expiry():
+    return timezone.now() + settings.COMMUNITY_STATUS_LIFETIME
+
+
+class ActiveStatusManager(models.Manager):
+    """Statuses that have not expired yet, compared against the database clock."""
+
+    def get_queryset(self):
+        return super().get_queryset().filter(expires_at__gt=Now())
+
+
 class Status(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, related_name="statuses", on_delete=models.CASCADE)
     caption = models.TextField(blank=True, null=True)
     image = models.ImageField(upload_to="status_images", blank=True, null=True, default=None)
+    image_renditions = models.JSONField(default=dict, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(default=status_expiry, db_index=True)
     likes = models.ManyToManyField(User, related_name="liked_statuses", blank=True)
+    likes_count = models.PositiveIntegerField(default=0)
+    replies_count = models.PositiveIntegerField(default=0)
+
+    objects = models.Manager()
+    active = ActiveStatusManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "created_at"], name="community_status_user_created"),
+        ]
 
     def like_status(self, user):
-        if user in self.likes.all():
-            self.likes.remove(user)
-        else:
-            self.likes.add(user)
+        return toggle_like(self, Status.likes.through.objects, status_id=self.pk, user_id=user.pk)
+
+    @classmethod
+    def feed_queryset(cls, user):
+        """
+        Unexpired statuses with their author's profile joined, the viewer's
+        seen state annotated and replies prefetched.
+        """
+        return cls.active.select_related("user__profile").annotate(
+            seen_by_viewer=Exists(SeenStatus.objects.filter(user_id=user.id, status_id=OuterRef("pk"))),
+        ).prefetch_related("replies")
 
     @property
     def is_expired(self):
-        return self.created_at < timezone.now() - timedelta(hours=24)
+        return self.expires_at <= timezone.now()
 
     def is_seen_by(self, user):
         from .models import SeenStatus  
@@ -166,5 +373,10 @@ class SeenStatus(models.Model):
     class Meta:
         unique_together = ['user', 'status']
 
+    @classmethod
+    def bulk_mark_seen(cls, pairs):
+        """Record (user_id, status_id) pairs in one INSERT, skipping those already seen."""
+        cls.objects.bulk_create([cls(user_id=user_id, status_id=status_id) for user_id, status_id in pairs], ignore_conflicts=True)
+
     def __str__(self):
         return f"{self.user.username} saw status {self.status.id}"
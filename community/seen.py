@@ -0,0 +1,71 @@
+import logging
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+class SeenBuffer:
+    """
+    Collects "seen" marks in memory and writes them with one
+    ``bulk_mark_seen`` call per model, either when ``max_size`` marks are
+    pending or every ``flush_interval`` seconds from a daemon thread.
+    Marks still buffered when the process dies are lost, which only means
+    an item may show up as unseen once more.
+    """
+
+    def __init__(self, flush_interval, max_size):
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self._pending = defaultdict(set)
+        self._size = 0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def add(self, model, user_id, object_ids):
+        with self._lock:
+            pending = self._pending[model]
+            before = len(pending)
+            pending.update((user_id, object_id) for object_id in object_ids)
+            self._size += len(pending) - before
+            full = self._size >= self.max_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="seen-buffer", daemon=True)
+                self._thread.start()
+        if full:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending, self._size = self._pending, defaultdict(set), 0
+        for model, pairs in pending.items():
+            try:
+                model.bulk_mark_seen(pairs)
+            except Exception:
+                logger.exception("Could not flush %d seen marks for %s", len(pairs), model.__name__)
+
+    def _run(self):
+        event = threading.Event()
+        while not event.wait(self.flush_interval):
+            self.flush()
+            close_old_connections()
+
+
+buffer = SeenBuffer(settings.COMMUNITY_SEEN_FLUSH_INTERVAL, settings.COMMUNITY_SEEN_FLUSH_SIZE)
+
+
+def record_seen(model, user_id, object_ids):
+    """
+    Mark ``object_ids`` as seen by ``user_id`` through ``model.bulk_mark_seen``:
+    immediately as a single INSERT, or via the in-memory buffer when
+    ``COMMUNITY_SEEN_BUFFERED`` is on.
+    """
+    if not object_ids:
+        return
+    if settings.COMMUNITY_SEEN_BUFFERED:
+        buffer.add(model, user_id, object_ids)
+    else:
+        model.bulk_mark_seen((user_id, object_id) for object_id in object_ids)
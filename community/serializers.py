@@ -1,39 +1,37 @@
 from rest_framework import serializers
 from .models import Posts, Comment, Reply, Status, StatusReply
 from django.contrib.auth.models import User
+from lavender.images import RenditionImageField, rendition_url
 
 
 class ReplySerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField(read_only=True)
-    likes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = Reply
         fields = ["id", "comment", "user", "content", "created_at", "edited", "likes_count"]
+        read_only_fields = ["likes_count"]
 
     def get_user(self, obj):
         return obj.user.id  # ✅ user id
 
-    def get_likes_count(self, obj):
-        return obj.reply_likes.count()
-
 
 class CommentSerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField()
-    likes_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
 
     class Meta:
         model = Comment
-        fields = ["id", "post", "user", "content", "created_at", "edited", "likes_count", "is_liked"]
+        fields = ["id", "post", "user", "content", "created_at", "edited", "likes_count", "replies_count", "is_liked"]
+        read_only_fields = ["likes_count", "replies_count"]
 
     def get_user(self, obj):
-        return obj.user.id
-
-    def get_likes_count(self, obj):
-        return obj.comment_likes.count()
+        return obj.user_id
 
     def get_is_liked(self, obj):
+        # annotated by Comment.viewer_queryset
+        if hasattr(obj, "viewer_liked"):
+            return obj.viewer_liked
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return obj.comment_likes.filter(user=request.user).exists()
@@ -41,30 +39,9 @@ class CommentSerializer(serializers.ModelSerializer):
 
 class PostSerializer(serializers.ModelSerializer):
     user = serializers.SerializerMethodField(read_only=True)
-    likes_count = serializers.SerializerMethodField()
-    comments = CommentSerializer(many=True, read_only=True)
-
-    class Meta:
-        model = Posts
-        fields = [
-            "id",
-            "user",
-            "caption",
-            "created_at",
-            "likes_count",
-            "image",
-            "video",
-            "comments",
-        ]
-
-    def get_likes_count(self, obj):
-        return obj.likes.count()
-
-class PostSerializer(serializers.ModelSerializer):
-    user = serializers.SerializerMethodField(read_only=True)
-    likes_count = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
-    comments = CommentSerializer(many=True, read_only=True)
+    comments = serializers.SerializerMethodField()
+    image_url = RenditionImageField("image", "image_renditions")
 
     class Meta:
         model = Posts
@@ -74,24 +51,34 @@ class PostSerializer(serializers.ModelSerializer):
             "caption",
             "created_at",
             "likes_count",
+            "comments_count",
             "is_liked",   
             "image",
+            "image_url",
             "video",
             "comments",
         ]
+        read_only_fields = ["likes_count", "comments_count"]
 
     def get_user(self, obj):
-        return obj.user.id
-
-    def get_likes_count(self, obj):
-        return obj.likes.count()
+        return obj.user_id
 
     def get_is_liked(self, obj):
+        # annotated by Posts.feed_queryset
+        if hasattr(obj, "viewer_liked"):
+            return obj.viewer_liked
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return obj.likes.filter(id=request.user.id).exists()
         return False
 
+    def get_comments(self, obj):
+        # feed pages only carry the newest few comments, see Posts.feed_queryset
+        comments = getattr(obj, "preview_comments", None)
+        if comments is None:
+            comments = obj.comments.all()
+        return CommentSerializer(comments, many=True, context=self.context).data
+
 class StatusReplySerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
 
@@ -108,34 +95,35 @@ class UserStatusSerializer(serializers.ModelSerializer):
         fields = ["id", "first_name", "last_name", "profile_pic", "statuses"]
 
     def get_statuses(self, user):
-        # Get all statuses for this user ordered by created_at
-        statuses = Status.objects.filter(user=user).order_by('-created_at')
+        # grouped in get_status_feed from Status.feed_queryset
+        statuses = getattr(user, "active_statuses", None)
+        if statuses is None:
+            statuses = Status.feed_queryset(self.context["request"].user).filter(user=user).order_by('-created_at')
         return StatusSerializer(statuses, many=True, context=self.context).data
 
     def get_profile_pic(self, user):
-        # Example: if User has a related profile model with a profile_pic field
+        # avatars are shown small, so prefer the thumbnail rendition
         if hasattr(user, 'profile') and user.profile.profile_pic:
-            request = self.context.get("request")
-            if request:
-                return request.build_absolute_uri(user.profile.profile_pic.url)
-            return user.profile.profile_pic.url
+            profile = user.profile
+            return rendition_url(profile.profile_pic, profile.profile_pic_renditions, "thumb", self.context.get("request"))
         return None
 
 
 class StatusSerializer(serializers.ModelSerializer):
     user = serializers.PrimaryKeyRelatedField(read_only=True)
-    likes_count = serializers.SerializerMethodField()
     is_seen = serializers.SerializerMethodField()
     replies = StatusReplySerializer(many=True, read_only=True)
+    image_url = RenditionImageField("image", "image_renditions")
 
     class Meta:
         model = Status
-        fields = ["id", "user", "caption", "image", "created_at", "likes_count", "is_seen", "replies"]
-
-    def get_likes_count(self, obj):
-        return obj.likes.count()
+        fields = ["id", "user", "caption", "image", "image_url", "created_at", "likes_count", "replies_count", "is_seen", "replies"]
+        read_only_fields = ["likes_count", "replies_count"]
 
     def get_is_seen(self, obj):
+        # annotated by Status.feed_queryset
+        if hasattr(obj, "seen_by_viewer"):
+            return obj.seen_by_viewer
         user = self.context.get("request").user
         return obj.is_seen_by(user)
 
@@ -1,3 +1,222 @@
-from django.test import TestCase
+import uuid
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from lavender.pagination import InvalidCursor, decode_cursor, encode_cursor
+from .models import Posts, SeenStatus, Status, StatusReply, TimelineEntry
+
+
+class StatusFeedTests(TestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(username="viewer", email="viewer@example.com", password="pass12345")
+        self.client = APIClient()
+        self.client.force_authenticate(self.viewer)
+        self.authors = 0
+
+    def create_author_with_statuses(self, count):
+        self.authors += 1
+        author = User.objects.create_user(username=f"author{self.authors}", email=f"author{self.authors}@example.com")
+        for i in range(count):
+            status_obj = Status.objects.create(user=author, caption=f"status {i}")
+            status_obj.like_status(self.viewer)
+            StatusReply.objects.create(status=status_obj, user=self.viewer, content="reply")
+        return author
+
+    def get_feed(self):
+        response = self.client.get("/api/v1/status/feed/")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["data"]
+
+    def test_query_count_does_not_grow_with_users_or_statuses(self):
+        # statuses + replies prefetch + one bulk "seen" insert
+        self.create_author_with_statuses(1)
+        with self.assertNumQueries(3):
+            self.get_feed()
+
+        for _ in range(8):
+            self.create_author_with_statuses(3)
+        with self.assertNumQueries(3):
+            data = self.get_feed()
+
+        self.assertEqual(len(data), 9)
+        self.assertEqual(sum(len(group["statuses"]) for group in data), 25)
+
+    def test_groups_statuses_by_user_with_current_user_first(self):
+        author = self.create_author_with_statuses(2)
+        Status.objects.create(user=self.viewer, caption="mine")
+
+        data = self.get_feed()
+
+        self.assertEqual([group["id"] for group in data], [self.viewer.id, author.id])
+        statuses = data[1]["statuses"]
+        self.assertEqual(len(statuses), 2)
+        self.assertEqual(statuses[0]["likes_count"], 1)
+        self.assertEqual(len(statuses[0]["replies"]), 1)
+        self.assertIsNotNone(data[1]["profile_pic"])
+
+    def test_excludes_expired_statuses_and_reports_seen_state(self):
+        author = self.create_author_with_statuses(1)
+        expired = Status.objects.create(user=author, caption="old")
+        Status.objects.filter(pk=expired.pk).update(expires_at=timezone.now() - timedelta(hours=1))
+
+        first = self.get_feed()
+        second = self.get_feed()
+
+        self.assertEqual(len(first[0]["statuses"]), 1)
+        self.assertFalse(first[0]["statuses"][0]["is_seen"])
+        self.assertTrue(second[0]["statuses"][0]["is_seen"])
+        self.assertFalse(SeenStatus.objects.filter(status=expired).exists())
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class TimelineFanOutTests(TestCase):
+    def setUp(self):
+        self.author = self.create_user("author", last_login=timezone.now())
+        self.reader = self.create_user("reader", last_login=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+
+    def create_user(self, username, last_login=None):
+        user = User.objects.create_user(username=username, email=f"{username}@example.com", password="pass12345")
+        User.objects.filter(pk=user.pk).update(last_login=last_login)
+        user.last_login = last_login
+        return user
+
+    def timeline(self, user):
+        return set(TimelineEntry.objects.filter(user=user).values_list("post_id", flat=True))
+
+    def test_post_is_fanned_out_once_the_transaction_commits(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post("/api/v1/posts/create/", {"caption": "hello"}, format="json")
+            post_id = response.json()["data"]["id"]
+            # the author sees it right away, everyone else after the commit
+            self.assertEqual({str(p) for p in self.timeline(self.author)}, {post_id})
+            self.assertEqual(self.timeline(self.reader), set())
+
+        for callback in callbacks:
+            callback()
+        self.assertEqual({str(p) for p in self.timeline(self.reader)}, {post_id})
+
+    def test_audience_is_members_active_within_the_window(self):
+        self.create_user("lapsed", last_login=timezone.now() - timedelta(days=31))
+        self.create_user("never")
+
+        audience = TimelineEntry.audience(self.author)
+
+        self.assertEqual(set(audience.values_list("username", flat=True)), {"author", "reader"})
+
+    @override_settings(COMMUNITY_FANOUT_CAP=1)
+    def test_audience_over_the_cap_is_left_to_the_read_path(self):
+        post = Posts.objects.create(user=self.author, caption="popular")
+
+        self.assertEqual(TimelineEntry.fan_out(post), 0)
+
+        post.refresh_from_db()
+        self.assertTrue(post.fanout_on_read)
+        self.assertEqual(self.timeline(self.reader), set())
+
+    def test_lapsed_member_catches_up_at_login(self):
+        lapsed = self.create_user("lapsed", last_login=timezone.now() - timedelta(days=31))
+        post = Posts.objects.create(user=self.author, caption="while you were away")
+        TimelineEntry.fan_out(post)
+        self.assertEqual(self.timeline(lapsed), set())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(self.client.login(username="lapsed", password="pass12345"))
+
+        self.assertEqual(self.timeline(lapsed), {post.pk})
+
+    def test_active_member_is_not_reseeded_at_login(self):
+        post = Posts.objects.create(user=self.author, caption="already delivered")
+        TimelineEntry.objects.filter(user=self.reader).delete()
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            self.assertTrue(self.client.login(username="reader", password="pass12345"))
+
+        self.assertEqual(callbacks, [])
+        self.assertNotIn(post.pk, self.timeline(self.reader))
+
+
+class FeedPaginationTests(TestCase):
+    def setUp(self):
+        self.reader = User.objects.create_user(username="reader", email="reader@example.com")
+        self.author = User.objects.create_user(username="author", email="author@example.com")
+        self.client = APIClient()
+        self.client.force_authenticate(self.reader)
+        self.start = timezone.now() - timedelta(hours=1)
+
+    def create_post(self, minutes, pushed=True, author=None):
+        """A post ``minutes`` after ``self.start``, in the reader's timeline or flagged fanout_on_read."""
+        created_at = self.start + timedelta(minutes=minutes)
+        post = Posts.objects.create(user=author or self.author, caption=f"post {minutes}", fanout_on_read=not pushed)
+        Posts.objects.filter(pk=post.pk).update(created_at=created_at)
+        post.created_at = created_at
+        if pushed:
+            TimelineEntry.objects.create(user=self.reader, post=post, created_at=created_at)
+        return post
+
+    def walk(self, page_size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            params = {"page_size": page_size}
+            if cursor:
+                params["cursor"] = cursor
+            response = self.client.get("/api/v1/posts/", params)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            self.assertLessEqual(len(body["data"]), page_size)
+            ids += [post["id"] for post in body["data"]]
+            pages += 1
+            cursor = body["next_cursor"]
+            if not cursor:
+                return ids, pages
+
+    def test_cursor_round_trips_dates_and_uuids(self):
+        post_id = uuid.uuid4()
+        moment = timezone.now()
+
+        token = encode_cursor([moment, post_id])
+
+        self.assertNotIn("=", token)
+        self.assertEqual(decode_cursor(token, 2), [moment.isoformat(), str(post_id)])
+        self.assertIsNone(decode_cursor("", 2))
+        with self.assertRaises(InvalidCursor):
+            decode_cursor(token, 3)
+
+    def test_posts_with_equal_timestamps_are_paged_by_id(self):
+        posts = [self.create_post(0) for _ in range(5)]
+
+        ids, pages = self.walk(page_size=2)
+
+        self.assertEqual(ids, [str(post.pk) for post in sorted(posts, key=lambda post: post.pk, reverse=True)])
+        self.assertEqual(pages, 3)
+
+    def test_tampered_cursor_is_rejected(self):
+        self.create_post(0)
+        cursors = [
+            "not-a-cursor",
+            encode_cursor(["yesterday", "nope"]),
+            encode_cursor([self.start, "nope"]),
+            encode_cursor([1, 2]),
+            encode_cursor([None, None]),
+            encode_cursor([self.start]),
+        ]
+        for cursor in cursors:
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/api/v1/posts/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+
+    def test_fanout_on_read_posts_merge_with_the_timeline_across_pages(self):
+        posts = [self.create_post(minutes, pushed=minutes % 3 != 0) for minutes in range(7)]
+        # the author of a fanout_on_read post also has it in their own timeline
+        own = self.create_post(7, pushed=False, author=self.reader)
+        TimelineEntry.objects.create(user=self.reader, post=own, created_at=own.created_at)
+        posts.append(own)
+
+        ids, _ = self.walk(page_size=3)
+
+        self.assertEqual(ids, [str(post.pk) for post in reversed(posts)])
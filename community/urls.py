@@ -1,9 +1,9 @@
 from django.urls import path
 from .views import (
-    create_post, edit_post, get_posts, like_post,
+    create_post, edit_post, get_posts, like_post, mark_posts_seen,
     add_comment, edit_comment, like_comment,
     add_reply, edit_reply, like_reply, get_post_comments, get_comment_replies,
-    create_status, like_status, get_status_feed, reply_status
+    create_status, like_status, get_status_feed, reply_status, mark_statuses_seen
 )
 
 urlpatterns = [
@@ -11,6 +11,7 @@ urlpatterns = [
     path("posts/create/", create_post, name="create_post"),
     path("posts/<uuid:post_id>/edit/", edit_post, name="edit_post"),
     path("posts/", get_posts, name="get_posts"),
+    path("posts/seen/", mark_posts_seen, name="mark_posts_seen"),
     path("posts/<uuid:post_id>/like/", like_post, name="like_post"),
 
     # Comments
@@ -30,5 +31,6 @@ urlpatterns = [
     path('status/<uuid:status_id>/like/', like_status, name='like_status'),
     path('status/<uuid:status_id>/reply/', reply_status, name='reply_status'),
     path('status/feed/', get_status_feed, name='status_feed'),
+    path('status/seen/', mark_statuses_seen, name='mark_statuses_seen'),
 
 ]
@@ -1,4 +1,5 @@
 from django.shortcuts import render
+import uuid
 
 from rest_framework.decorators import api_view, permission_classes, parser_classes
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
@@ -7,8 +8,13 @@ from rest_framework.response import Response
 from rest_framework import status
 from .models import *
 from .serializers import *
-from django.db.models import Case, When, Value, IntegerField
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.conf import settings
 from account.permissions import *
+from .seen import record_seen
+from lavender.images import schedule_renditions
+from lavender.pagination import InvalidCursor, decode_cursor, encode_cursor, filter_after, get_page_size
 
 
 @api_view(['POST'])
@@ -19,12 +25,16 @@ def create_post(request):
     if not caption:
         return Response({"error": "Caption is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    post = Posts.objects.create(
-        user=request.user,
-        caption=caption,
-        image=request.data.get("image") or None,
-        video=request.data.get("video") or None
-    )
+    with transaction.atomic():
+        post = Posts.objects.create(
+            user=request.user,
+            caption=caption,
+            image=request.data.get("image") or None,
+            video=request.data.get("video") or None
+        )
+        TimelineEntry.publish(post)
+        if post.image:
+            schedule_renditions(post, "image", "image_renditions")
 
     return Response(
         {"status": "success", "data": PostSerializer(post).data},
@@ -48,6 +58,8 @@ def edit_post(request, post_id):
     post.image = image if image != "" else None
     post.video = video if video != "" else None
     post.save()
+    if "image" in request.data:
+        schedule_renditions(post, "image", "image_renditions")
 
     return Response(
         {"status": "success", "data": PostSerializer(post).data},
@@ -55,29 +67,88 @@ def edit_post(request, post_id):
     )
 
 
-# @api_view(['GET'])
-# def get_posts(request):
-#     user = request.user
-
-#     # exclude posts already seen by this user
-#     seen_post_ids = UserSeenPosts.objects.filter(user=user).values_list('post_id', flat=True)
-#     new_posts = Posts.objects.exclude(id__in=seen_post_ids).order_by("-created_at")
-
-#     # mark these posts as seen
-#     for post in new_posts:
-#         UserSeenPosts.objects.get_or_create(user=user, post=post)
+def _timeline_page(user, cursor, page_size, unseen=False):
+    """
+    Ids of one feed page, newest first: the reader's materialized timeline
+    merged with posts flagged ``fanout_on_read``. Each side is a keyset range
+    scan of at most ``page_size + 1`` rows.
+    """
+    values = decode_cursor(cursor, 2)
+    sources = [
+        (TimelineEntry.objects.filter(user=user), "post_id"),
+        (Posts.objects.filter(fanout_on_read=True), "id"),
+    ]
+
+    rows = {}
+    for queryset, id_field in sources:
+        if unseen:
+            queryset = queryset.exclude(Exists(UserSeenPosts.objects.filter(user=user, post_id=OuterRef(id_field))))
+        if values is not None:
+            queryset = filter_after(queryset, ("created_at", id_field), values)
+        queryset = queryset.order_by("-created_at", "-" + id_field).values_list(id_field, "created_at")
+        rows.update(queryset[:page_size + 1])
+
+    ordered = sorted(rows.items(), key=lambda row: (row[1], row[0]), reverse=True)
+    next_cursor = None
+    if len(ordered) > page_size:
+        ordered = ordered[:page_size]
+        post_id, created_at = ordered[-1]
+        next_cursor = encode_cursor([created_at, post_id])
+    return [post_id for post_id, _ in ordered], next_cursor
 
-#     serializer = PostSerializer(new_posts, many=True)
-#     return Response({"status": "success", "data": serializer.data}, status=status.HTTP_200_OK)
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_posts(request):
     user = request.user
+    page_size = get_page_size(request, settings.COMMUNITY_FEED_PAGE_SIZE, settings.COMMUNITY_FEED_MAX_PAGE_SIZE)
+    unseen = request.query_params.get("unseen") in ("1", "true", "True")
+
+    try:
+        post_ids, next_cursor = _timeline_page(user, request.query_params.get("cursor"), page_size, unseen)
+    except InvalidCursor:
+        return Response({"error": "Invalid cursor."}, status=status.HTTP_400_BAD_REQUEST)
+
+    posts = Posts.feed_queryset(user, comments_preview=settings.COMMUNITY_FEED_COMMENTS_PREVIEW).in_bulk(post_ids)
+    page = [posts[post_id] for post_id in post_ids if post_id in posts]
+
+    serializer = PostSerializer(page, many=True, context={'request': request})
+    return Response({
+        "status": "success",
+        "data": serializer.data,
+        "next_cursor": next_cursor,
+    }, status=status.HTTP_200_OK)
+
+def _existing_ids(request, model):
+    """
+    Validate the ``ids`` list posted by the client and keep only those that
+    exist. Returns ``(ids, error_response)``.
+    """
+    ids = request.data.get("ids")
+    if not isinstance(ids, list) or not ids:
+        return None, Response({"error": "ids must be a non-empty list."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(ids) > settings.COMMUNITY_SEEN_MAX_IDS:
+        return None, Response(
+            {"error": f"At most {settings.COMMUNITY_SEEN_MAX_IDS} ids per request."},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    try:
+        ids = {uuid.UUID(str(value)) for value in ids}
+    except ValueError:
+        return None, Response({"error": "ids must be UUIDs."}, status=status.HTTP_400_BAD_REQUEST)
+    return list(model.objects.filter(id__in=ids).values_list("id", flat=True)), None
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_posts_seen(request):
+    post_ids, error = _existing_ids(request, Posts)
+    if error:
+        return error
+
+    record_seen(UserSeenPosts, request.user.id, post_ids)
+    return Response({"status": "success", "marked": len(post_ids)}, status=status.HTTP_200_OK)
 
-    posts = Posts.objects.all()
-    serializer = PostSerializer(posts, many=True, context={'request': request})
-    return Response({"status": "success", "data": serializer.data}, status=status.HTTP_200_OK)
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
@@ -87,19 +158,17 @@ def like_post(request, post_id):
     except Posts.DoesNotExist:
         return Response({"error": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    user = request.user
-
-    if user in post.likes.all():
-        post.likes.remove(user)
+    if not post.like_post(request.user):
         return Response({
             "status": "success",
+            "likes_count": post.likes_count,
             "likes": []
         }, status=status.HTTP_200_OK)
     else:
-        post.likes.add(user)
         liked_users = post.likes.all().values("id", "username", "email")
         return Response({
             "status": "success",
+            "likes_count": post.likes_count,
             "likes": list(liked_users)  
         }, status=status.HTTP_200_OK)
 
@@ -116,7 +185,9 @@ def add_comment(request, post_id):
     if not content:
         return Response({"error": "Content is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    comment = Comment.objects.create(post=post, user=request.user, content=content)
+    with transaction.atomic():
+        comment = Comment.objects.create(post=post, user=request.user, content=content)
+        adjust_counter(Posts, post.pk, "comments_count", 1)
     return Response({"status": "success", "data": CommentSerializer(comment).data}, status=status.HTTP_201_CREATED)
 
 @api_view(['POST'])
@@ -127,17 +198,11 @@ def like_comment(request, comment_id):
     except Comment.DoesNotExist:
         return Response({"error": "Comment not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    # Create or toggle like
-    like, created = LikeComments.objects.get_or_create(user=request.user, comment=comment)
-    if not created:
-        like.delete()
-
-    # Check if current user now likes the comment
-    is_liked = LikeComments.objects.filter(user=request.user, comment=comment).exists()
+    is_liked = comment.like_comment(request.user)
 
     return Response({
         "status": "success",
-        "likes_count": comment.comment_likes.count(),
+        "likes_count": comment.likes_count,
         "is_liked": is_liked
     }, status=status.HTTP_200_OK)
 
@@ -150,7 +215,7 @@ def get_post_comments(request, post_id):
     except Posts.DoesNotExist:
         return Response({"error": "Post not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    comments = post.comments.all().order_by("-created_at")
+    comments = Comment.viewer_queryset(request.user).filter(post=post).order_by("-created_at")
     serializer = CommentSerializer(comments, many=True, context={"request": request})
     return Response({"status": "success", "data": serializer.data}, status=status.HTTP_200_OK)
 
@@ -187,7 +252,9 @@ def add_reply(request, comment_id):
     if not content:
         return Response({"error": "Content is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    reply = Reply.objects.create(comment=comment, user=request.user, content=content)
+    with transaction.atomic():
+        reply = Reply.objects.create(comment=comment, user=request.user, content=content)
+        adjust_counter(Comment, comment.pk, "replies_count", 1)
     return Response({"status": "success", "data": ReplySerializer(reply).data}, status=status.HTTP_201_CREATED)
 
 @api_view(['POST'])
@@ -198,13 +265,8 @@ def like_reply(request, reply_id):
     except Reply.DoesNotExist:
         return Response({"error": "Reply not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    like, created = LikeReplies.objects.get_or_create(user=request.user, reply=reply)
-
-    if not created:
-        like.delete()
-        return Response({"status": "success", "likes_count": reply.reply_likes.count()}, status=status.HTTP_200_OK)
-
-    return Response({"status": "success", "likes_count": reply.reply_likes.count()}, status=status.HTTP_200_OK)
+    reply.like_reply(request.user)
+    return Response({"status": "success", "likes_count": reply.likes_count}, status=status.HTTP_200_OK)
 
 
 @api_view(['PUT'])
@@ -248,6 +310,8 @@ def create_status(request):
         caption=caption,
         image=image
     )
+    if status_obj.image:
+        schedule_renditions(status_obj, "image", "image_renditions")
 
     serializer = StatusSerializer(status_obj, context={"request": request})
 
@@ -265,12 +329,10 @@ def like_status(request, status_id):
     except Status.DoesNotExist:
         return Response({"error": "Status not found"}, status=status.HTTP_404_NOT_FOUND)
 
-    if request.user in status_obj.likes.all():
-        status_obj.likes.remove(request.user)
-        return Response({"status": "unliked", "likes_count": status_obj.likes.count()})
+    if status_obj.like_status(request.user):
+        return Response({"status": "liked", "likes_count": status_obj.likes_count})
     else:
-        status_obj.likes.add(request.user)
-        return Response({"status": "liked", "likes_count": status_obj.likes.count()})
+        return Response({"status": "unliked", "likes_count": status_obj.likes_count})
 
 
 @api_view(['POST'])
@@ -285,43 +347,49 @@ def reply_status(request, status_id):
     if not content:
         return Response({"error": "Content is required."}, status=status.HTTP_400_BAD_REQUEST)
 
-    reply = StatusReply.objects.create(
-        status=status_obj,
-        user=request.user,
-        content=content
-    )
+    with transaction.atomic():
+        reply = StatusReply.objects.create(
+            status=status_obj,
+            user=request.user,
+            content=content
+        )
+        adjust_counter(Status, status_obj.pk, "replies_count", 1)
 
     return Response({"status": "success", "data": StatusReplySerializer(reply).data}, status=status.HTTP_201_CREATED)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def mark_statuses_seen(request):
+    status_ids, error = _existing_ids(request, Status)
+    if error:
+        return error
+
+    record_seen(SeenStatus, request.user.id, status_ids)
+    return Response({"status": "success", "marked": len(status_ids)}, status=status.HTTP_200_OK)
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_status_feed(request):
-    now = timezone.now()
-    
-    # Get all statuses in last 24 hours
-    # statuses = Status.objects.filter(created_at__gte=now - timedelta(hours=24))
-    
-    statuses = Status.objects.filter(
-    user= request.user,
-    created_at__gte=timezone.now() - timedelta(hours=24)
-)
+    user = request.user
+
+    # One query for every active status (with author and profile) and one
+    # prefetch for their replies; grouping by author happens in Python.
+    statuses = list(Status.feed_queryset(user).order_by("-created_at", "-id"))
 
     # Mark as seen
+    record_seen(SeenStatus, user.id, [s.id for s in statuses])
+
+    # Group by user, newest first, current user on top
+    users_with_statuses = {}
     for s in statuses:
-        SeenStatus.objects.get_or_create(user=request.user, status=s)
-    
-    # Group by user
-    users_with_statuses = User.objects.filter(statuses__in=statuses).distinct()
-    
-    # Optional: prioritize current user first
-    users_with_statuses = users_with_statuses.annotate(
-        is_current_user=Case(
-            When(id=request.user.id, then=Value(0)),
-            default=Value(1),
-            output_field=IntegerField()
-        )
-    ).order_by("is_current_user")
-    
-    serializer = UserStatusSerializer(users_with_statuses, many=True, context={"request": request})
+        if s.user_id not in users_with_statuses:
+            s.user.active_statuses = []
+            users_with_statuses[s.user_id] = s.user
+        users_with_statuses[s.user_id].active_statuses.append(s)
+
+    users = sorted(users_with_statuses.values(), key=lambda u: u.id != user.id)
+
+    serializer = UserStatusSerializer(users, many=True, context={"request": request})
     return Response({"status": "success", "data": serializer.data})
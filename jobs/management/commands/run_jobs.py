@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from jobs.queue import requeue_stale, run_due_jobs
+
+
+class Command(BaseCommand):
+    help = "Run pending background jobs (retries and anything left over after a restart)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--limit", type=int, default=100, help="Jobs to run per pass.")
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting after one pass.")
+        parser.add_argument("--interval", type=float, default=5, help="Seconds between passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            requeued = requeue_stale()
+            ran = run_due_jobs(options["limit"])
+            if requeued or ran:
+                self.stdout.write(self.style.SUCCESS(f"Requeued {requeued} stale job(s), ran {ran} job(s)."))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,104 @@
+import logging
+import threading
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from lavender import background
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+# the job the current thread is running, see is_last_attempt()
+_running = threading.local()
+
+
+def enqueue(task, max_attempts=None, **kwargs):
+    """
+    Record a job for ``task`` (a dotted path) and hand it to the in-process
+    worker pool once the surrounding transaction commits.
+    """
+    job = Job.objects.create(
+        task=task,
+        kwargs=kwargs,
+        max_attempts=max_attempts or settings.JOBS_MAX_ATTEMPTS,
+    )
+    background.submit(run_job, job.pk)
+    return job
+
+
+def is_last_attempt():
+    """
+    Whether a failure of the task running in this thread is final, i.e. the
+    job will not be retried. Also true when the task was called directly.
+    """
+    job = getattr(_running, "job", None)
+    return job is None or job.attempts >= job.max_attempts
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.JOBS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def run_job(job_id):
+    """
+    Claim and run one job. The claim is a conditional UPDATE, so a job that
+    was submitted in-process and also picked up by ``run_jobs`` runs once.
+    Returns ``True`` if this call ran the job.
+    """
+    now = timezone.now()
+    claimed = Job.objects.filter(
+        pk=job_id, status=JobStatus.PENDING, run_after__lte=now
+    ).update(status=JobStatus.RUNNING, attempts=F("attempts") + 1, updated_at=now)
+    if not claimed:
+        return False
+
+    job = Job.objects.get(pk=job_id)
+    _running.job = job
+    try:
+        import_string(job.task)(**job.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            delay = retry_delay(job.attempts)
+            Job.objects.filter(pk=job.pk).update(
+                status=JobStatus.PENDING, run_after=timezone.now() + delay,
+                last_error=error, updated_at=timezone.now(),
+            )
+            logger.warning("Job %s (%s) failed, retrying in %s", job.pk, job.task, delay)
+            if not settings.BACKGROUND_TASKS_EAGER:
+                timer = threading.Timer(delay.total_seconds(), background.submit, (run_job, job.pk))
+                timer.daemon = True
+                timer.start()
+        else:
+            Job.objects.filter(pk=job.pk).update(
+                status=JobStatus.FAILED, last_error=error, updated_at=timezone.now()
+            )
+            logger.error("Job %s (%s) failed after %s attempts", job.pk, job.task, job.attempts)
+        return True
+    finally:
+        _running.job = None
+
+    Job.objects.filter(pk=job.pk).update(status=JobStatus.DONE, last_error="", updated_at=timezone.now())
+    return True
+
+
+def requeue_stale(older_than=None):
+    """Return jobs stuck in ``running`` (e.g. the process died) to the queue."""
+    cutoff = timezone.now() - (older_than or timedelta(seconds=settings.JOBS_STALE_AFTER))
+    return Job.objects.filter(status=JobStatus.RUNNING, updated_at__lt=cutoff).update(
+        status=JobStatus.PENDING, updated_at=timezone.now()
+    )
+
+
+def run_due_jobs(limit=100):
+    """Run pending jobs whose ``run_after`` has passed, oldest first."""
+    ids = list(
+        Job.objects.filter(status=JobStatus.PENDING, run_after__lte=timezone.now())
+        .order_by("run_after")
+        .values_list("pk", flat=True)[:limit]
+    )
+    return sum(run_job(job_id) for job_id in ids)
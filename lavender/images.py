@@ -0,0 +1,116 @@
+import logging
+import os
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+from rest_framework import serializers
+
+from . import background
+
+logger = logging.getLogger(__name__)
+
+
+def rendition_name(name, size):
+    directory, filename = os.path.split(name)
+    stem = os.path.splitext(filename)[0]
+    return f"{directory}/renditions/{stem}_{size}.webp"
+
+
+def build_renditions(name):
+    """
+    Decode the stored image ``name`` once and write a WebP copy bounded by
+    each ``IMAGE_RENDITIONS`` edge length. Returns ``{size: {name, width, height}}``.
+    """
+    renditions = {}
+    with default_storage.open(name, "rb") as source, Image.open(source) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+        for size, edge in sorted(settings.IMAGE_RENDITIONS.items(), key=lambda item: item[1]):
+            copy = image.copy()
+            copy.thumbnail((edge, edge), Image.LANCZOS)
+            buffer = BytesIO()
+            copy.save(buffer, "WEBP", quality=settings.IMAGE_RENDITION_QUALITY, method=4)
+
+            target = rendition_name(name, size)
+            if default_storage.exists(target):
+                default_storage.delete(target)
+            renditions[size] = {
+                "name": default_storage.save(target, ContentFile(buffer.getvalue())),
+                "width": copy.width,
+                "height": copy.height,
+            }
+    return renditions
+
+
+def delete_renditions(renditions):
+    """Remove the files of a ``{size: {name, ...}}`` renditions mapping from storage."""
+    for rendition in (renditions or {}).values():
+        try:
+            default_storage.delete(rendition["name"])
+        except (KeyError, TypeError, OSError):
+            logger.warning("Could not delete rendition %s", rendition, exc_info=True)
+
+
+def process_renditions(model_label, pk, field, renditions_field, name):
+    try:
+        renditions = build_renditions(name)
+    except (OSError, Image.DecompressionBombError):
+        logger.warning("Could not build renditions for %s", name, exc_info=True)
+        return
+    # Only store them if the image was not replaced while we were working.
+    model = apps.get_model(model_label)
+    if not model.objects.filter(pk=pk, **{field: name}).update(**{renditions_field: renditions}):
+        delete_renditions(renditions)
+
+
+def schedule_renditions(instance, field, renditions_field):
+    """
+    Queue rendition generation for ``instance.<field>`` on the background
+    pool. Renditions of the previous image are cleared right away and their
+    files deleted once the transaction commits.
+    """
+    previous = getattr(instance, renditions_field)
+    if previous:
+        type(instance).objects.filter(pk=instance.pk).update(**{renditions_field: {}})
+        setattr(instance, renditions_field, {})
+        background.submit(delete_renditions, previous)
+
+    file = getattr(instance, field)
+    if file:
+        background.submit(
+            process_renditions, instance._meta.label, instance.pk, field, renditions_field, file.name
+        )
+
+
+def rendition_url(file, renditions, size, request=None):
+    """URL of the ``size`` rendition if it has been generated, else of the original."""
+    if not file:
+        return None
+    rendition = (renditions or {}).get(size) if size else None
+    url = default_storage.url(rendition["name"]) if rendition else file.url
+    return request.build_absolute_uri(url) if request else url
+
+
+class RenditionImageField(serializers.Field):
+    """
+    Read-only URL of the image rendition requested with ``?image_size=``
+    (one of ``IMAGE_RENDITIONS``), falling back to the original upload.
+    """
+
+    def __init__(self, image_field, renditions_field, **kwargs):
+        self.image_field = image_field
+        self.renditions_field = renditions_field
+        kwargs["source"] = "*"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, instance):
+        request = self.context.get("request")
+        size = request.query_params.get("image_size") if request is not None else None
+        return rendition_url(
+            getattr(instance, self.image_field), getattr(instance, self.renditions_field), size, request
+        )
@@ -0,0 +1,141 @@
+import mimetypes
+import os
+import re
+import stat
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from django.views.decorators.http import require_safe
+
+RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class RangeFile:
+    """
+    Read-only view of ``length`` bytes of an open file starting at ``start``.
+    It deliberately has no ``fileno``/``seek`` so ``FileResponse`` streams it
+    in blocks instead of handing the whole file to ``wsgi.file_wrapper``.
+    """
+
+    def __init__(self, file, start, length):
+        self.file = file
+        self.name = file.name
+        self.remaining = length
+        file.seek(start)
+
+    def read(self, size=-1):
+        if self.remaining <= 0:
+            return b""
+        if size is None or size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    Return ``(start, end)`` (inclusive) for a single ``bytes=`` range, ``None``
+    when the header should be ignored (absent, malformed or multi-range), or
+    raise ``ValueError`` when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip()) if header else None
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if size == 0:
+        # an empty file has no byte any range could select
+        raise ValueError(header)
+    if not first:
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(header)
+        return max(size - length, 0), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or end < start:
+        raise ValueError(header)
+    return start, end
+
+
+def if_range_matches(header, etag, mtime):
+    if not header:
+        return True
+    if header.startswith(('"', 'W/')):
+        return header == etag
+    return parse_http_date_safe(header) == int(mtime)
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve a file from MEDIA_ROOT with byte-range, ETag and Last-Modified
+    support so audio and video players can seek without re-downloading.
+    When MEDIA_SENDFILE_BACKEND is set, the body is left to the front proxy.
+    """
+    try:
+        fullpath = safe_join(settings.MEDIA_ROOT, path)
+        st = os.stat(fullpath)
+    except (SuspiciousFileOperation, OSError):
+        raise Http404("File not found.")
+    if not stat.S_ISREG(st.st_mode):
+        raise Http404("File not found.")
+
+    size, mtime = st.st_size, st.st_mtime
+    etag = f'"{int(mtime):x}-{size:x}"'
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or "application/octet-stream"
+
+    backend = settings.MEDIA_SENDFILE_BACKEND
+    if backend:
+        # nginx/Apache answer conditional and Range requests themselves.
+        response = HttpResponse(content_type=content_type)
+        if backend == "x-accel-redirect":
+            response["X-Accel-Redirect"] = settings.MEDIA_ACCEL_REDIRECT_PREFIX.rstrip("/") + "/" + path.lstrip("/")
+        elif backend == "x-sendfile":
+            response["X-Sendfile"] = fullpath
+        else:
+            raise ValueError(f"Unknown MEDIA_SENDFILE_BACKEND {backend!r}")
+        return response
+
+    response = get_conditional_response(request, etag=etag, last_modified=int(mtime))
+    if response is not None:
+        response["ETag"] = etag
+        response["Accept-Ranges"] = "bytes"
+        return response
+
+    byte_range = None
+    if if_range_matches(request.headers.get("If-Range"), etag, mtime):
+        try:
+            byte_range = parse_range(request.headers.get("Range"), size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response["Content-Range"] = f"bytes */{size}"
+            response["Accept-Ranges"] = "bytes"
+            return response
+
+    file = open(fullpath, "rb")
+    if byte_range is None:
+        # A real file object lets the server use wsgi.file_wrapper / sendfile.
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        response = FileResponse(RangeFile(file, start, end - start + 1), content_type=content_type, status=206)
+        response["Content-Range"] = f"bytes {start}-{end}/{size}"
+        response["Content-Length"] = end - start + 1
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Accept-Ranges"] = "bytes"
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(mtime)
+    return response
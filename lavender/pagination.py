@@ -0,0 +1,99 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime, time
+from decimal import Decimal
+from uuid import UUID
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def _to_json(value):
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+    if isinstance(value, (UUID, Decimal)):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    """
+    Encode the keyset position (the ordering values of the last row of a page)
+    into an opaque url-safe token.
+    """
+    raw = json.dumps([_to_json(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token, length):
+    """
+    Decode a token produced by ``encode_cursor``. Returns ``None`` for an empty
+    token and raises ``InvalidCursor`` for anything malformed.
+    """
+    if not token:
+        return None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor("Invalid cursor.")
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursor("Invalid cursor.")
+    return values
+
+
+def keyset_filter(fields, values, descending=True):
+    """
+    Build the row-value comparison ``(f1, f2, ...) < (v1, v2, ...)`` (or ``>``
+    when ascending) as a ``Q`` so it can use a composite index range scan.
+    """
+    lookup = "lt" if descending else "gt"
+    condition = Q(**{f"{fields[-1]}__{lookup}": values[-1]})
+    for field, value in reversed(list(zip(fields[:-1], values[:-1]))):
+        condition = Q(**{f"{field}__{lookup}": value}) | (Q(**{field: value}) & condition)
+    return condition
+
+
+def filter_after(queryset, fields, values, descending=True):
+    """
+    Narrow ``queryset`` to the rows after the keyset position ``values``.
+    Raises ``InvalidCursor`` when the values do not fit the fields, e.g. a
+    tampered cursor carrying a string where a date belongs.
+    """
+    try:
+        return queryset.filter(keyset_filter(fields, values, descending))
+    except (ValidationError, TypeError, ValueError):
+        raise InvalidCursor("Invalid cursor.")
+
+
+def get_page_size(request, default, maximum, param="page_size"):
+    try:
+        size = int(request.query_params.get(param, default))
+    except (TypeError, ValueError):
+        size = default
+    return max(1, min(size, maximum))
+
+
+def paginate_keyset(queryset, fields, cursor, page_size, descending=True):
+    """
+    Return one page of ``queryset`` ordered by ``fields`` starting after
+    ``cursor``, together with the cursor of the next page (``None`` when the
+    end has been reached). Fetches ``page_size + 1`` rows and nothing else.
+    """
+    values = decode_cursor(cursor, len(fields))
+    if values is not None:
+        queryset = filter_after(queryset, fields, values, descending)
+
+    prefix = "-" if descending else ""
+    rows = list(queryset.order_by(*[prefix + f for f in fields])[:page_size + 1])
+
+    next_cursor = None
+    if len(rows) > page_size:
+        rows = rows[:page_size]
+        next_cursor = encode_cursor([getattr(rows[-1], f) for f in fields])
+    return rows, next_cursor
@@ -0,0 +1,66 @@
+import html
+import re
+
+# Private-use markers passed to snippet()/ts_headline() so the surrounding
+# text can be HTML-escaped before the <mark> tags are put in.
+MARK_START = "\ue000"
+MARK_STOP = "\ue001"
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# Harakat, Quranic marks and tatweel carry no meaning for search.
+ARABIC_MARKS_RE = re.compile("[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]")
+# Letter variants people type interchangeably: hamza forms of alef, alef
+# maqsura / ya, ta marbuta / ha and hamza carriers.
+ARABIC_LETTERS = str.maketrans({
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي", "ؤ": "و", "ة": "ه",
+})
+ARABIC_ARTICLE = "ال"
+
+
+def tokenize(text):
+    return TOKEN_RE.findall(text or "")
+
+
+def normalize_text(text):
+    """
+    Fold ``text`` into the form stored in search documents: lower case,
+    Arabic diacritics and tatweel removed, letter variants unified and the
+    definite article stripped, words separated by single spaces. Apply it to
+    queries too so both sides match.
+    """
+    text = ARABIC_MARKS_RE.sub("", (text or "").lower()).translate(ARABIC_LETTERS)
+    words = []
+    for token in tokenize(text):
+        if token.startswith(ARABIC_ARTICLE) and len(token) > len(ARABIC_ARTICLE) + 1:
+            token = token[len(ARABIC_ARTICLE):]
+        words.append(token)
+    return " ".join(words)
+
+
+def fts5_match(text, prefix=True):
+    """
+    Turn free user input into a safe FTS5 MATCH expression: every word is
+    quoted (so operators and syntax errors cannot be injected) and all words
+    must match. The last word also matches as a prefix for search-as-you-type.
+    Returns ``None`` when there is nothing to search for.
+    """
+    tokens = tokenize(text)
+    if not tokens:
+        return None
+    terms = ['"%s"' % token.replace('"', '""') for token in tokens]
+    if prefix:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def tsquery_text(text):
+    """Words of ``text`` joined for ``plainto_tsquery`` (which ANDs them)."""
+    return " ".join(tokenize(text))
+
+
+def mark_snippet(snippet):
+    """HTML-escape a highlighted snippet and turn the markers into ``<mark>``."""
+    escaped = html.escape(snippet or "")
+    return escaped.replace(MARK_START, "<mark>").replace(MARK_STOP, "</mark>")
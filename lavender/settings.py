@@ -34,7 +34,9 @@ INSTALLED_APPS = [
     'appointments',
     'community',
     'programs',
-    'chat'
+    'chat',
+    'uploads',
+    'jobs',
 ]
 
 MIDDLEWARE = [
@@ -121,6 +123,10 @@ EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+# None streams media from Django; "x-accel-redirect" (nginx) or "x-sendfile"
+# (Apache/lighttpd) hands the body to the front proxy instead.
+MEDIA_SENDFILE_BACKEND = None
+MEDIA_ACCEL_REDIRECT_PREFIX = '/protected-media/'
 
 
 LANGUAGE_CODE = 'en-us'
@@ -143,6 +149,101 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Community feed
+COMMUNITY_FEED_PAGE_SIZE = 20
+COMMUNITY_FEED_MAX_PAGE_SIZE = 50
+COMMUNITY_FEED_COMMENTS_PREVIEW = 3
+# posts whose audience is larger than this are merged into feeds at read time
+COMMUNITY_FANOUT_CAP = 5000
+# posts are pushed to members who logged in within this many days
+COMMUNITY_FANOUT_ACTIVE_DAYS = 30
+# number of recent posts copied into a new member's timeline
+COMMUNITY_TIMELINE_SEED = 200
+# buffer "seen" marks in memory and write them from a background thread
+COMMUNITY_SEEN_BUFFERED = False
+COMMUNITY_SEEN_FLUSH_INTERVAL = 2  # seconds
+COMMUNITY_SEEN_FLUSH_SIZE = 500
+COMMUNITY_SEEN_MAX_IDS = 200
+# statuses disappear after this long; expired ones are purged in chunks
+COMMUNITY_STATUS_LIFETIME = timedelta(hours=24)
+COMMUNITY_STATUS_EXPIRY_CHUNK_SIZE = 500
+COMMUNITY_STATUS_EXPIRY_SLEEP = 0.1  # seconds between chunks
+COMMUNITY_STATUS_EXPIRY_INTERVAL = 300  # seconds between purges with delete_expired_status --loop
+
+# Background jobs (jobs app): retries back off JOBS_RETRY_DELAY * 2**(attempt-1) seconds
+JOBS_MAX_ATTEMPTS = 3
+JOBS_RETRY_DELAY = 30
+JOBS_STALE_AFTER = 600  # seconds before a "running" job is assumed dead
+
+# Number of peaks in MusicCard.waveform_peaks (inline) and MusicCard.waveform (endpoint)
+MUSIC_WAVEFORM_SUMMARY_SIZE = 64
+MUSIC_WAVEFORM_SIZE = 1024
+MUSIC_WAVEFORM_CACHE_SECONDS = 7 * 24 * 3600  # for the versioned waveform_url only
+
+# Appointment slots generated from a specialist's availability
+APPOINTMENT_SLOT_MINUTES = 60
+APPOINTMENT_SLOTS_IN_BACKGROUND = False
+# How long an unpaid checkout keeps a slot before it can be booked again
+APPOINTMENT_HOLD_MINUTES = 15
+APPOINTMENT_HOLD_RELEASE_INTERVAL = 60
+# Cross-specialist availability search pages
+APPOINTMENT_SEARCH_PAGE_SIZE = 20
+APPOINTMENT_SEARCH_MAX_PAGE_SIZE = 50
+# Months of weekly/monthly buckets refresh_specialist_stats recomputes
+APPOINTMENT_STATS_MONTHS = 12
+# Upcoming slots embedded per specialist with ?expand=appointments
+SPECIALIST_LIST_EXPAND_SLOTS = 5
+# Specialist full-text search pages; relevance boost of a 5-star average rating
+SPECIALIST_SEARCH_PAGE_SIZE = 10
+SPECIALIST_SEARCH_MAX_PAGE_SIZE = 50
+SPECIALIST_SEARCH_RATING_WEIGHT = 0.5
+
+# Chat message history pages
+CHAT_MESSAGES_PAGE_SIZE = 50
+CHAT_MESSAGES_MAX_PAGE_SIZE = 200
+
+CHAT_SEARCH_PAGE_SIZE = 20
+CHAT_SEARCH_MAX_PAGE_SIZE = 50
+
+# Also write one ReadReceipt per message on mark-read; the per-conversation
+# read_upto watermark is always kept and is usually enough
+CHAT_PER_MESSAGE_RECEIPTS = False
+
+# Chat push over WebSocket (lavender.asgi). The in-memory layer only reaches
+# sockets in the same process; with more than one worker or host use
+# 'chat.realtime.DatabaseChannelLayer', which relays events through the database.
+CHAT_WEBSOCKET_PATH = '/ws/chat/'
+CHAT_CHANNEL_LAYER = 'chat.realtime.InMemoryChannelLayer'
+CHAT_WEBSOCKET_QUEUE_SIZE = 100
+CHAT_CHANNEL_POLL_INTERVAL = 0.5  # seconds
+CHAT_CHANNEL_POLL_BATCH = 500
+CHAT_CHANNEL_RETENTION = 60  # seconds ChatEvent rows are kept
+CHAT_CHANNEL_PURGE_EVERY = 120  # polls between purges of old ChatEvent rows
+
+# Resumable chunked uploads (post videos, music files)
+CHUNKED_UPLOAD_TEMP_DIR = os.path.join(BASE_DIR, 'tmp', 'uploads')
+CHUNKED_UPLOAD_MAX_SIZE = 2 * 1024 ** 3
+CHUNKED_UPLOAD_MAX_CHUNK = 8 * 1024 ** 2
+CHUNKED_UPLOAD_BUFFER_SIZE = 64 * 1024
+# idle sessions expire after this; purge_expired_uploads removes them and their parts
+CHUNKED_UPLOAD_EXPIRY = timedelta(hours=24)
+CHUNKED_UPLOAD_PURGE_INTERVAL = 3600
+
+# In-process worker pool used for work that should not block a request
+BACKGROUND_WORKERS = 4
+BACKGROUND_TASKS_EAGER = False
+
+# Longest edge in pixels of each WebP rendition generated for uploaded images
+IMAGE_RENDITIONS = {
+    "thumb": 160,
+    "small": 480,
+    "medium": 960,
+    "large": 1600,
+}
+IMAGE_RENDITION_QUALITY = 80
+
 STRIPE_PUBLIC_KEY = ''
 STRIPE_SECRET_KEY = ''
+# Signing secret of the endpoint Stripe sends checkout events to (payment/webhook/)
+STRIPE_WEBHOOK_SECRET = ''
 SITE_URL = 'http://127.0.0.1:8000/'
\ No newline at end of file
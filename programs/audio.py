@@ -0,0 +1,168 @@
+import array
+import math
+import operator
+import shutil
+import subprocess
+import sys
+import warnings
+import wave
+
+try:
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", DeprecationWarning)
+        import audioop
+except ImportError:  # removed in Python 3.13
+    audioop = None
+
+# Rate ffmpeg resamples to when decoding for peaks; plenty for a scrub bar.
+PEAK_SAMPLE_RATE = 8000
+READ_FRAMES = 64 * 1024
+# Starting bucket when the sample count isn't known up front (10 ms at the peak rate)
+UNKNOWN_LENGTH_BUCKET = PEAK_SAMPLE_RATE // 100
+
+
+def read_info(path):
+    """Return duration (seconds), bitrate (bps) and sample rate read by mutagen."""
+    from mutagen import File as MutagenFile
+
+    audio = MutagenFile(path)
+    if audio is None:
+        raise ValueError(f"Unrecognised audio format: {path}")
+    info = audio.info
+    return {
+        "duration": getattr(info, "length", None),
+        "bitrate": getattr(info, "bitrate", None) or None,
+        "sample_rate": getattr(info, "sample_rate", None) or None,
+    }
+
+
+def _to_samples(data):
+    samples = array.array("h")
+    samples.frombytes(data[:len(data) - len(data) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return samples
+
+
+def _wav_samples(path):
+    with wave.open(path, "rb") as source:
+        if source.getsampwidth() != 2:
+            raise ValueError("Only 16-bit PCM WAV is decoded without ffmpeg.")
+        total = source.getnframes() * source.getnchannels()
+
+        def chunks():
+            while True:
+                data = source.readframes(READ_FRAMES)
+                if not data:
+                    return
+                yield _to_samples(data)
+
+        yield total
+        yield from chunks()
+
+
+def _ffmpeg_samples(path, duration):
+    process = subprocess.Popen(
+        ["ffmpeg", "-v", "error", "-i", path, "-f", "s16le", "-ac", "1", "-ar", str(PEAK_SAMPLE_RATE), "-"],
+        stdout=subprocess.PIPE,
+        stdin=subprocess.DEVNULL,
+    )
+    try:
+        yield int((duration or 0) * PEAK_SAMPLE_RATE)
+        while True:
+            data = process.stdout.read(READ_FRAMES * 2)
+            if not data:
+                break
+            yield _to_samples(data)
+    finally:
+        process.stdout.close()
+        if process.wait() != 0:
+            raise ValueError(f"ffmpeg could not decode {path}")
+
+
+def decode_samples(path, duration=None):
+    """
+    Stream signed 16-bit samples of ``path``. The first item yielded is the
+    expected sample count (an estimate for compressed formats), followed by
+    ``array('h')`` chunks. Returns ``None`` when no decoder is available.
+    """
+    if path.lower().endswith(".wav"):
+        try:
+            with wave.open(path, "rb") as source:
+                if source.getsampwidth() == 2:
+                    return _wav_samples(path)
+        except (wave.Error, EOFError):
+            pass
+    if shutil.which("ffmpeg"):
+        return _ffmpeg_samples(path, duration)
+    return None
+
+
+def _peak(samples):
+    if audioop is not None:
+        return audioop.max(samples, 2)
+    return max(max(samples), -min(samples))
+
+
+def _sum_of_squares(samples):
+    if audioop is not None:
+        # audioop truncates the RMS to an integer, well below what the
+        # rounded dBFS figure can show for anything but near silence
+        return audioop.rms(samples, 2) ** 2 * len(samples)
+    return sum(map(operator.mul, samples, samples))
+
+
+def compute_waveform(stream, buckets):
+    """
+    Reduce a ``decode_samples`` stream to ``buckets`` peak amplitudes scaled
+    to 0-255 and the overall RMS loudness in dBFS, in a single pass and
+    without holding the decoded audio. When the sample count is unknown or
+    underestimated, buckets start small and neighbours are merged whenever
+    twice ``buckets`` peaks have been collected, so memory stays bounded.
+    """
+    total = next(stream)
+    bucket_size = -(-total // buckets) if total else UNKNOWN_LENGTH_BUCKET
+    peaks = []
+    current, filled = 0, 0
+    squares, count = 0, 0
+    for chunk in stream:
+        squares += _sum_of_squares(chunk)
+        count += len(chunk)
+        offset = 0
+        while offset < len(chunk):
+            part = chunk[offset:offset + bucket_size - filled]
+            current = max(current, _peak(part))
+            filled += len(part)
+            offset += len(part)
+            if filled == bucket_size:
+                peaks.append(current)
+                current, filled = 0, 0
+                if len(peaks) >= 2 * buckets:
+                    peaks = [max(peaks[i:i + 2]) for i in range(0, len(peaks), 2)]
+                    bucket_size *= 2
+    if filled:
+        peaks.append(current)
+
+    peaks = downsample(peaks, buckets)
+    peaks += [0] * (buckets - len(peaks))
+    peaks = [min(255, peak * 255 // 32767) for peak in peaks]
+
+    rms = math.sqrt(squares / count) / 32768 if count else 0
+    loudness = round(20 * math.log10(rms), 2) if rms else None
+    return peaks, loudness
+
+
+def downsample(peaks, size):
+    """Max-pool ``peaks`` down to at most ``size`` values."""
+    if len(peaks) <= size:
+        return list(peaks)
+    step = len(peaks) / size
+    return [max(peaks[int(i * step):max(int((i + 1) * step), int(i * step) + 1)]) for i in range(size)]
+
+
+def analyse(path, buckets, duration=None):
+    """Decode ``path`` once; returns ``(peaks, loudness)`` or ``(None, None)`` without a decoder."""
+    stream = decode_samples(path, duration)
+    if stream is None:
+        return None, None
+    return compute_waveform(stream, buckets)
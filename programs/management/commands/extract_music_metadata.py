@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from jobs.queue import enqueue
+from programs.models import MetadataStatus, MusicCard
+
+
+class Command(BaseCommand):
+    help = "Queue metadata extraction for music cards that have not been processed yet."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true", help="Reprocess every card, including ready ones.")
+
+    def handle(self, *args, **options):
+        cards = MusicCard.objects.exclude(audio_file="").exclude(audio_file__isnull=True)
+        if not options["all"]:
+            cards = cards.exclude(metadata_status=MetadataStatus.READY)
+        count = 0
+        for music_id in cards.values_list("id", flat=True).iterator():
+            enqueue("programs.tasks.extract_music_metadata", music_id=str(music_id))
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f"Queued {count} music card(s)."))
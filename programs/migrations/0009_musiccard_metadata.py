@@ -0,0 +1,43 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0008_freeprogram_user_alter_enrollment_user_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='musiccard',
+            name='bitrate',
+            field=models.PositiveIntegerField(blank=True, help_text='Bits per second.', null=True),
+        ),
+        migrations.AddField(
+            model_name='musiccard',
+            name='metadata_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='musiccard',
+            name='metadata_error',
+            field=models.TextField(blank=True, default=''),
+        ),
+        migrations.AddField(
+            model_name='musiccard',
+            name='metadata_status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('ready', 'Ready'), ('failed', 'Failed')], default='pending', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='musiccard',
+            name='sample_rate',
+            field=models.PositiveIntegerField(blank=True, help_text='Hz.', null=True),
+        ),
+        migrations.AddField(
+            model_name='musiccard',
+            name='waveform_peaks',
+            field=models.JSONField(blank=True, default=list, help_text='Peak amplitudes (0-255) for a scrub bar preview.'),
+        ),
+    ]
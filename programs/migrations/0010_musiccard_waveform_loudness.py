@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('programs', '0009_musiccard_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='musiccard',
+            name='loudness',
+            field=models.FloatField(blank=True, help_text='RMS level in dBFS.', null=True),
+        ),
+        migrations.AddField(
+            model_name='musiccard',
+            name='waveform',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+    ]
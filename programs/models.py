@@ -1,8 +1,16 @@
+import hashlib
 import uuid
-import datetime
 from django.db import models
 from django.contrib.auth.models import User
 from account.models import Profile, RoleChoices
+from jobs.queue import enqueue
+
+class MetadataStatus(models.TextChoices):
+    PENDING = 'pending', 'Pending'
+    PROCESSING = 'processing', 'Processing'
+    READY = 'ready', 'Ready'
+    FAILED = 'failed', 'Failed'
+
 
 class MusicCard(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -11,53 +19,61 @@ class MusicCard(models.Model):
     album = models.CharField(max_length=200, default="Single", blank=True)
     album_cover = models.ImageField(upload_to="music_covers/",default="music_covers/music_cover.png", blank=True, null=True)
     audio_file = models.FileField(upload_to="music_files/", blank=True, null=True)
-    # duration stored as DurationField and will be filled automatically
+    # duration, bitrate, sample_rate, loudness and the waveform are filled by a background job
     duration = models.DurationField(blank=True, null=True)
+    bitrate = models.PositiveIntegerField(blank=True, null=True, help_text="Bits per second.")
+    sample_rate = models.PositiveIntegerField(blank=True, null=True, help_text="Hz.")
+    waveform_peaks = models.JSONField(default=list, blank=True, help_text="Peak amplitudes (0-255) for a scrub bar preview.")
+    # MUSIC_WAVEFORM_SIZE peaks, one unsigned byte each, served by MusicWaveformView
+    waveform = models.BinaryField(blank=True, null=True, editable=False)
+    loudness = models.FloatField(blank=True, null=True, help_text="RMS level in dBFS.")
+    metadata_status = models.CharField(max_length=20, choices=MetadataStatus.choices, default=MetadataStatus.PENDING)
+    metadata_error = models.TextField(blank=True, default="")
+    metadata_attempts = models.PositiveIntegerField(default=0)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    # name of the audio file as loaded from the database, to detect replacements
+    _loaded_audio_name = None
+
     def __str__(self):
         return f"{self.author} - {self.title} ({self.album})"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if "audio_file" in instance.__dict__:
+            instance._loaded_audio_name = instance.audio_file.name or None
+        return instance
+
+    @staticmethod
+    def waveform_version_of(audio_name):
+        return hashlib.md5(audio_name.encode(), usedforsecurity=False).hexdigest()[:12] if audio_name else None
+
+    @property
+    def waveform_version(self):
+        """Changes whenever the audio file is replaced; versions the waveform URL."""
+        return self.waveform_version_of(self.audio_file.name if self.audio_file else None)
+
     def save(self, *args, **kwargs):
         """
-        Save first to ensure the file exists on disk, then compute duration (if a new file was uploaded)
+        Queue metadata extraction when a new audio file is attached; the
+        upload itself returns without opening the file.
         """
-        # Determine if audio file changed
-        audio_changed = False
-        try:
-            if self.pk:
-                old = MusicCard.objects.get(pk=self.pk)
-                old_name = old.audio_file.name if old.audio_file else None
-                new_name = self.audio_file.name if self.audio_file else None
-                audio_changed = new_name and new_name != old_name
-            else:
-                # new instance with file
-                audio_changed = bool(self.audio_file)
-        except MusicCard.DoesNotExist:
-            audio_changed = bool(self.audio_file)
-
-        # Save first so file is present on disk for mutagen
+        new_name = self.audio_file.name if self.audio_file else None
+        audio_changed = bool(new_name) and new_name != self._loaded_audio_name
+        if audio_changed:
+            self.metadata_status = MetadataStatus.PENDING
+            self.metadata_error = ""
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "metadata_status", "metadata_error"}
+
         super().save(*args, **kwargs)
+        self._loaded_audio_name = self.audio_file.name if self.audio_file else None
 
-        if audio_changed and self.audio_file:
-            try:
-                # compute duration using mutagen
-                from mutagen import File as MutagenFile
-
-                file_path = self.audio_file.path  # requires local FS
-                audio = MutagenFile(file_path)
-                length_secs = getattr(audio.info, "length", None)
-                if length_secs is not None:
-                    # round or keep fractional seconds as you like
-                    self.duration = datetime.timedelta(seconds=round(length_secs))
-                    # update only the duration field to avoid recursion
-                    MusicCard.objects.filter(pk=self.pk).update(duration=self.duration)
-            except Exception:
-                # silently fail or log — don't block saves on duration error
-                # you can use logging.warning(...) here
-                pass
+        if audio_changed:
+            enqueue("programs.tasks.extract_music_metadata", music_id=str(self.pk))
 
 
 class PsychoMeasurementQuiz(models.Model):
@@ -1,5 +1,7 @@
+from django.urls import reverse
 from rest_framework import serializers
 from .models import (
+    MetadataStatus,
     MusicCard,
     PsychoMeasurementQuiz,
     QuizQuestion,
@@ -21,10 +23,23 @@ class MusicCardSerializer(serializers.ModelSerializer):
     duration = serializers.DurationField(read_only=True)
     album_cover = serializers.ImageField(required=False, allow_null=True)
     audio_file = serializers.FileField(required=False, allow_null=True)
+    waveform_url = serializers.SerializerMethodField()
 
     class Meta:
         model = MusicCard
-        fields = "__all__"
+        exclude = ["waveform"]
+        read_only_fields = [
+            "bitrate", "sample_rate", "waveform_peaks", "loudness",
+            "metadata_status", "metadata_error", "metadata_attempts",
+        ]
+
+    def get_waveform_url(self, obj):
+        """Versioned by the audio file, so it can be cached until the audio changes."""
+        if obj.metadata_status != MetadataStatus.READY or not obj.audio_file:
+            return None
+        url = reverse("music-waveform", kwargs={"id": obj.id}) + f"?v={obj.waveform_version}"
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
 
 # ---------------- QUIZ STRUCTURE ---------------- #
 
@@ -0,0 +1,39 @@
+import datetime
+
+from django.conf import settings
+from django.db.models import F
+from jobs.queue import is_last_attempt
+from .audio import analyse, downsample, read_info
+from .models import MetadataStatus, MusicCard
+
+
+def extract_music_metadata(music_id):
+    """Fill duration, bitrate, sample rate, loudness and the waveform of a MusicCard."""
+    card = MusicCard.objects.filter(pk=music_id).only("id", "audio_file").first()
+    if card is None or not card.audio_file:
+        return
+    name = card.audio_file.name
+    # Only touch the row while it still points at the file we are reading.
+    current = MusicCard.objects.filter(pk=music_id, audio_file=name)
+    current.update(metadata_status=MetadataStatus.PROCESSING, metadata_attempts=F("metadata_attempts") + 1)
+
+    try:
+        path = card.audio_file.path
+        info = read_info(path)
+        peaks, loudness = analyse(path, settings.MUSIC_WAVEFORM_SIZE, info["duration"])
+    except Exception as exc:
+        # stay pending while the job runner is going to retry
+        status = MetadataStatus.FAILED if is_last_attempt() else MetadataStatus.PENDING
+        current.update(metadata_status=status, metadata_error=str(exc)[:500])
+        raise
+
+    current.update(
+        duration=datetime.timedelta(seconds=round(info["duration"])) if info["duration"] is not None else None,
+        bitrate=info["bitrate"],
+        sample_rate=info["sample_rate"],
+        waveform=bytes(peaks) if peaks else None,
+        waveform_peaks=downsample(peaks, settings.MUSIC_WAVEFORM_SUMMARY_SIZE) if peaks else [],
+        loudness=loudness,
+        metadata_status=MetadataStatus.READY,
+        metadata_error="",
+    )
@@ -1,3 +1,46 @@
-from django.test import TestCase
+import array
+from unittest import mock
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from .audio import compute_waveform
+
+
+def stream(total, *chunks):
+    yield total
+    for chunk in chunks:
+        yield array.array("h", chunk)
+
+
+class ComputeWaveformTests(SimpleTestCase):
+    def test_peaks_follow_the_signal(self):
+        quiet, loud = [100, -100] * 500, [32767, -32767] * 500
+
+        peaks, _ = compute_waveform(stream(4000, quiet, loud, quiet, loud), 4)
+
+        self.assertEqual(peaks, [0, 255, 0, 255])
+
+    def test_unknown_length_keeps_the_requested_resolution(self):
+        silence = [0] * 8000
+        burst = [16384, -16384] * 4000
+
+        peaks, _ = compute_waveform(stream(0, *[silence] * 29, burst), 10)
+
+        self.assertEqual(len(peaks), 10)
+        self.assertEqual(peaks[:9], [0] * 9)
+        self.assertEqual(peaks[9], 127)
+
+    def test_loudness_is_rms_in_dbfs(self):
+        _, loudness = compute_waveform(stream(8000, [16384, -16384] * 4000), 8)
+        self.assertAlmostEqual(loudness, -6.02, places=1)
+
+        _, silent = compute_waveform(stream(10, [0] * 10), 2)
+        self.assertIsNone(silent)
+
+    def test_same_figures_without_audioop(self):
+        chunks = ([0] * 3000, [12000, -9000] * 1500, [300] * 2000)
+        peaks, loudness = compute_waveform(stream(0, *chunks), 4)
+        with mock.patch("programs.audio.audioop", None):
+            plain_peaks, plain_loudness = compute_waveform(stream(0, *chunks), 4)
+        self.assertEqual(plain_peaks, peaks)
+        self.assertAlmostEqual(plain_loudness, loudness, places=1)
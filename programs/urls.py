@@ -1,13 +1,14 @@
 from django.urls import path
 from .views import (
     QuizListView, QuizDetailView,
-    SubmitAnswerView, SubmitQuizResultView, QuizResultView, MusicCardListCreateView, MusicCardDetailView,
+    SubmitAnswerView, SubmitQuizResultView, QuizResultView, MusicCardListCreateView, MusicCardDetailView, MusicWaveformView,
     CheckoutCourseSessionView, SuccessfulCoursePaymentView, CourseViewSet, EnrollmentViewSet, FreeProgramListView
 )
 
 urlpatterns = [
     path("music/", MusicCardListCreateView.as_view(), name="music-list"),
     path("music/<uuid:id>/", MusicCardDetailView.as_view(), name="music-detail"),
+    path("music/<uuid:id>/waveform/", MusicWaveformView.as_view(), name="music-waveform"),
     path("quizzes/", QuizListView.as_view(), name="quiz-list"),
     path("quizzes/<uuid:pk>/", QuizDetailView.as_view(), name="quiz-detail"),
     path("answers/submit/", SubmitAnswerView.as_view(), name="submit-answer"),
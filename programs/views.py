@@ -13,6 +13,9 @@ from django.conf import settings
 from django.views.generic import TemplateView
 from rest_framework.views import APIView
 from decimal import Decimal, InvalidOperation
+import hashlib
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
 from account.models import RoleChoices
 
 stripe.api_key = settings.STRIPE_SECRET_KEY
@@ -28,6 +31,41 @@ class MusicCardDetailView(generics.RetrieveUpdateDestroyAPIView):
     parser_classes = (MultiPartParser, FormParser)
     lookup_field = "id"
 
+class MusicWaveformView(APIView):
+    """
+    Raw waveform peaks of a music card (one unsigned byte per bucket) so a
+    player can draw the scrub bar without fetching the audio. Requested with
+    the card's current ``?v=`` (see ``waveform_url``) the response is cached
+    for long; otherwise clients revalidate against an ETag of the audio file.
+    """
+
+    def get(self, request, id):
+        row = MusicCard.objects.filter(id=id).values_list("waveform", "metadata_status", "audio_file").first()
+        if row is None:
+            return Response({"error": "Music not found."}, status=status.HTTP_404_NOT_FOUND)
+        waveform, metadata_status, audio_name = row
+        if not waveform:
+            return Response(
+                {"error": "Waveform is not available.", "metadata_status": metadata_status},
+                status=status.HTTP_404_NOT_FOUND,
+            )
+
+        waveform = bytes(waveform)
+        version = MusicCard.waveform_version_of(audio_name)
+        digest = hashlib.md5(audio_name.encode(), usedforsecurity=False)
+        digest.update(waveform)
+        etag = '"%s"' % digest.hexdigest()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = HttpResponse(waveform, content_type="application/octet-stream")
+        response["ETag"] = etag
+        if request.query_params.get("v") == version:
+            response["Cache-Control"] = f"public, max-age={settings.MUSIC_WAVEFORM_CACHE_SECONDS}, immutable"
+        else:
+            response["Cache-Control"] = "no-cache"
+        return response
+
+
 class QuizListView(generics.ListAPIView):
     queryset = PsychoMeasurementQuiz.objects.all().prefetch_related("questions__answers")
     serializer_class = PsychoMeasurementQuizSerializer
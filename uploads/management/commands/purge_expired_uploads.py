@@ -0,0 +1,22 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from uploads.models import UploadSession
+
+
+class Command(BaseCommand):
+    help = "Delete expired chunked upload sessions and their partial files"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Keep running instead of exiting after one pass.")
+        parser.add_argument("--interval", type=int, default=settings.CHUNKED_UPLOAD_PURGE_INTERVAL,
+                            help="Seconds between passes with --loop.")
+
+    def handle(self, *args, **options):
+        while True:
+            count = UploadSession.purge_expired()
+            self.stdout.write(self.style.SUCCESS(f"Purged {count} expired uploads."))
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,19 @@
+# Generated by Django 5.1.6 on 2026-10-18 10:56
+
+import uploads.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('uploads', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='uploadsession',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=uploads.models.upload_expiry),
+        ),
+    ]
@@ -0,0 +1,148 @@
+import hashlib
+import logging
+import os
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import models
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTarget(models.TextChoices):
+    POST_VIDEO = 'post_video', 'Post video'
+    MUSIC_AUDIO = 'music_audio', 'Music audio'
+
+
+# target -> (model, file field, field holding the owner or None)
+TARGETS = {
+    UploadTarget.POST_VIDEO: ('community.Posts', 'video', 'user'),
+    UploadTarget.MUSIC_AUDIO: ('programs.MusicCard', 'audio_file', None),
+}
+
+
+class UploadStatus(models.TextChoices):
+    ACTIVE = 'active', 'Active'
+    COMPLETED = 'completed', 'Completed'
+    FAILED = 'failed', 'Failed'
+
+
+def upload_expiry():
+    return timezone.now() + settings.CHUNKED_UPLOAD_EXPIRY
+
+
+class UploadSession(models.Model):
+    """
+    A resumable upload: chunks are appended to a temporary file at
+    ``received`` until ``total_size`` bytes have arrived, then the file is
+    verified against ``checksum`` and attached to its target object.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user = models.ForeignKey(User, related_name='upload_sessions', on_delete=models.CASCADE)
+    target = models.CharField(max_length=20, choices=UploadTarget.choices)
+    object_id = models.UUIDField()
+    filename = models.CharField(max_length=255)
+    total_size = models.PositiveBigIntegerField()
+    checksum = models.CharField(max_length=64, help_text="SHA-256 of the whole file, hex encoded")
+    received = models.PositiveBigIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=UploadStatus.choices, default=UploadStatus.ACTIVE)
+    file = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    # pushed forward by every chunk; abandoned sessions are purged after it
+    expires_at = models.DateTimeField(default=upload_expiry, db_index=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.total_size}) by {self.user.username}"
+
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
+
+    @property
+    def temp_path(self):
+        return os.path.join(settings.CHUNKED_UPLOAD_TEMP_DIR, f"{self.id}.part")
+
+    def target_queryset(self, user):
+        model_label, _, owner_field = TARGETS[self.target]
+        queryset = apps.get_model(model_label).objects.all()
+        if owner_field:
+            queryset = queryset.filter(**{owner_field: user})
+        return queryset
+
+    def write_chunk(self, start, stream, length):
+        """
+        Copy ``length`` bytes from ``stream`` into the temporary file at
+        offset ``start`` in fixed-size pieces, so memory stays bounded however
+        large the chunk is. Returns the number of bytes written.
+        """
+        os.makedirs(settings.CHUNKED_UPLOAD_TEMP_DIR, exist_ok=True)
+        mode = 'r+b' if os.path.exists(self.temp_path) else 'wb'
+        written = 0
+        with open(self.temp_path, mode) as part:
+            part.seek(start)
+            while written < length:
+                piece = stream.read(min(settings.CHUNKED_UPLOAD_BUFFER_SIZE, length - written))
+                if not piece:
+                    break
+                part.write(piece)
+                written += len(piece)
+            part.truncate()
+        return written
+
+    def verify(self):
+        digest = hashlib.sha256()
+        with open(self.temp_path, 'rb') as part:
+            for piece in iter(lambda: part.read(settings.CHUNKED_UPLOAD_BUFFER_SIZE), b''):
+                digest.update(piece)
+        return digest.hexdigest() == self.checksum.lower()
+
+    def finalize(self, instance):
+        """
+        Move the verified file into the target field's upload directory and
+        attach it to ``instance``, deleting the file it replaces. A rename
+        when the storage is local, a streamed copy otherwise.
+        """
+        _, field_name, _ = TARGETS[self.target]
+        field = instance._meta.get_field(field_name)
+        replaced = getattr(instance, field_name).name
+        name = default_storage.get_available_name(field.generate_filename(instance, self.filename))
+        try:
+            path = default_storage.path(name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(self.temp_path, path)
+        except (NotImplementedError, OSError):
+            with open(self.temp_path, 'rb') as part:
+                name = default_storage.save(name, File(part))
+            os.remove(self.temp_path)
+
+        getattr(instance, field_name).name = name
+        instance.save(update_fields=[field_name])
+        if replaced and replaced != name:
+            try:
+                default_storage.delete(replaced)
+            except OSError:
+                logger.warning("Could not delete replaced upload %s", replaced, exc_info=True)
+
+        self.file = name
+        self.status = UploadStatus.COMPLETED
+        self.save(update_fields=['file', 'status', 'updated_at'])
+        return name
+
+    def discard(self):
+        if os.path.exists(self.temp_path):
+            os.remove(self.temp_path)
+
+    @classmethod
+    def purge_expired(cls, now=None):
+        """Delete sessions past ``expires_at`` with their partial files. Returns how many."""
+        expired = list(cls.objects.filter(expires_at__lte=now or timezone.now()))
+        for upload in expired:
+            upload.discard()
+        cls.objects.filter(pk__in=[upload.pk for upload in expired]).delete()
+        return len(expired)
@@ -0,0 +1,33 @@
+import re
+
+from django.conf import settings
+from rest_framework import serializers
+from .models import UploadSession
+
+
+class UploadSessionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = UploadSession
+        fields = [
+            "id", "target", "object_id", "filename", "total_size", "checksum",
+            "received", "status", "file", "created_at", "updated_at", "expires_at",
+        ]
+        read_only_fields = ["id", "received", "status", "file", "created_at", "updated_at", "expires_at"]
+
+    def validate_total_size(self, value):
+        if value <= 0:
+            raise serializers.ValidationError("Size must be positive.")
+        if value > settings.CHUNKED_UPLOAD_MAX_SIZE:
+            raise serializers.ValidationError(f"Files larger than {settings.CHUNKED_UPLOAD_MAX_SIZE} bytes are not accepted.")
+        return value
+
+    def validate_checksum(self, value):
+        if not re.fullmatch(r"[0-9a-fA-F]{64}", value):
+            raise serializers.ValidationError("Checksum must be a hex encoded SHA-256 digest.")
+        return value.lower()
+
+    def validate(self, attrs):
+        upload = UploadSession(target=attrs["target"])
+        if not upload.target_queryset(self.context["request"].user).filter(pk=attrs["object_id"]).exists():
+            raise serializers.ValidationError({"object_id": "Target not found or not yours."})
+        return attrs
@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import UploadSessionCreateView, UploadSessionDetailView, UploadCompleteView
+
+urlpatterns = [
+    path("uploads/", UploadSessionCreateView.as_view(), name="upload-create"),
+    path("uploads/<uuid:upload_id>/", UploadSessionDetailView.as_view(), name="upload-detail"),
+    path("uploads/<uuid:upload_id>/complete/", UploadCompleteView.as_view(), name="upload-complete"),
+]
@@ -0,0 +1,113 @@
+import re
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from .models import UploadSession, UploadStatus, upload_expiry
+from .serializers import UploadSessionSerializer
+
+CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class UploadSessionCreateView(APIView):
+    """Start a resumable upload for a post video or a music file."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = UploadSessionSerializer(data=request.data, context={"request": request})
+        if serializer.is_valid():
+            upload = serializer.save(user=request.user)
+            return Response({"status": "success", "data": UploadSessionSerializer(upload).data}, status=status.HTTP_201_CREATED)
+        return Response({"status": "failed", "message": serializer.errors}, status=status.HTTP_400_BAD_REQUEST)
+
+
+class UploadSessionDetailView(APIView):
+    """
+    GET reports how many bytes were received so a client can resume.
+    PUT appends the raw request body at the offset given by
+    ``Content-Range: bytes <start>-<end>/<total>``; the body is streamed to
+    disk and never held in memory.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get_upload(self, request, upload_id):
+        try:
+            return UploadSession.objects.get(id=upload_id, user=request.user)
+        except UploadSession.DoesNotExist:
+            return None
+
+    def get(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        if upload is None:
+            return Response({"error": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+        return Response({"status": "success", "data": UploadSessionSerializer(upload).data})
+
+    def put(self, request, upload_id):
+        upload = self.get_upload(request, upload_id)
+        if upload is None:
+            return Response({"error": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+        if upload.status != UploadStatus.ACTIVE:
+            return Response({"error": f"Upload is {upload.status}."}, status=status.HTTP_409_CONFLICT)
+        if upload.is_expired:
+            return Response({"error": "Upload expired."}, status=status.HTTP_410_GONE)
+
+        match = CONTENT_RANGE.match(request.headers.get("Content-Range", ""))
+        if not match:
+            return Response({"error": "Content-Range header is required."}, status=status.HTTP_400_BAD_REQUEST)
+        start, end, total = (int(value) for value in match.groups())
+        length = end - start + 1
+        if total != upload.total_size or end < start or end >= total:
+            return Response({"error": "Content-Range does not match this upload."}, status=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE)
+        if length > settings.CHUNKED_UPLOAD_MAX_CHUNK:
+            return Response({"error": f"Chunks are limited to {settings.CHUNKED_UPLOAD_MAX_CHUNK} bytes."}, status=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE)
+        if int(request.META.get("CONTENT_LENGTH") or 0) != length:
+            return Response({"error": "Body length does not match Content-Range."}, status=status.HTTP_400_BAD_REQUEST)
+        if start != upload.received:
+            return Response({"error": "Unexpected offset.", "received": upload.received}, status=status.HTTP_409_CONFLICT)
+
+        written = upload.write_chunk(start, request.stream, length)
+        # Only advance if nobody else wrote at this offset in the meantime.
+        advanced = UploadSession.objects.filter(
+            pk=upload.pk, received=start, status=UploadStatus.ACTIVE
+        ).update(received=start + written, updated_at=timezone.now(), expires_at=upload_expiry())
+        if not advanced:
+            upload.refresh_from_db()
+            return Response({"error": "Unexpected offset.", "received": upload.received}, status=status.HTTP_409_CONFLICT)
+
+        upload.refresh_from_db()
+        return Response({"status": "success", "data": UploadSessionSerializer(upload).data})
+
+
+class UploadCompleteView(APIView):
+    """Verify the checksum and attach the assembled file to its target."""
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, upload_id):
+        try:
+            upload = UploadSession.objects.get(id=upload_id, user=request.user, status=UploadStatus.ACTIVE)
+        except UploadSession.DoesNotExist:
+            return Response({"error": "Upload not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        if upload.is_expired:
+            return Response({"error": "Upload expired."}, status=status.HTTP_410_GONE)
+        if upload.received != upload.total_size:
+            return Response({"error": "Upload is incomplete.", "received": upload.received}, status=status.HTTP_409_CONFLICT)
+
+        if not upload.verify():
+            upload.discard()
+            upload.status = UploadStatus.FAILED
+            upload.save(update_fields=["status", "updated_at"])
+            return Response({"error": "Checksum mismatch, upload discarded."}, status=status.HTTP_400_BAD_REQUEST)
+
+        instance = upload.target_queryset(request.user).filter(pk=upload.object_id).first()
+        if instance is None:
+            upload.discard()
+            upload.status = UploadStatus.FAILED
+            upload.save(update_fields=["status", "updated_at"])
+            return Response({"error": "Target not found or not yours."}, status=status.HTTP_404_NOT_FOUND)
+
+        upload.finalize(instance)
+        return Response({"status": "success", "data": UploadSessionSerializer(upload).data})